@@ -7,8 +7,16 @@ from langchain_core.messages import HumanMessage, AIMessage
 
 # Import custom modules
 from config import settings
-from langgraph import create_search_workflow
-from utils import CSS_STYLES, HEADER_HTML, PROS_SECTION_HTML, CONS_SECTION_HTML
+from langgraph import (
+    create_search_workflow,
+    create_initial_state,
+    stream_search,
+    run_search,
+    search_key,
+    stored_product_name,
+    reviews_older_than
+)
+from utils import CSS_STYLES, HEADER_HTML, PROS_SECTION_HTML, CONS_SECTION_HTML, SingleFlight, ResultCache
 
 # Page configuration
 st.set_page_config(
@@ -30,6 +38,24 @@ def get_search_workflow():
 
 search_app = get_search_workflow()
 
+# Shared by all sessions in this process; the lease file coordinates other processes
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight(settings.SINGLEFLIGHT_LEASE_PATH, settings.SINGLEFLIGHT_LEASE_TTL)
+
+single_flight = get_single_flight()
+
+# Final results keyed by normalized product name, shared by all sessions
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(
+        max_entries=settings.RESULT_CACHE_SIZE,
+        ttl=settings.RESULT_CACHE_TTL,
+        stale_ttl=settings.RESULT_CACHE_STALE_TTL
+    )
+
+result_cache = get_result_cache()
+
 # Search section
 col1, col2, col3 = st.columns([1, 3, 1])
 
@@ -41,24 +67,83 @@ with col2:
     
     search_button = st.button("검색하기", use_container_width=True)
 
+
+def render_partial_results(placeholder, pros, cons, sources):
+    """Render pros/cons collected so far while the crawl is still running"""
+    with placeholder.container():
+        st.caption(f"📝 지금까지 {len(sources)}개 리뷰에서 수집한 내용")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(PROS_SECTION_HTML, unsafe_allow_html=True)
+            for idx, pro in enumerate(pros[:10], 1):
+                st.write(f"{idx}. {pro}")
+        with col2:
+            st.markdown(CONS_SECTION_HTML, unsafe_allow_html=True)
+            for idx, con in enumerate(cons[:10], 1):
+                st.write(f"{idx}. {con}")
+
+
+def support_label(state, side, idx):
+    """Suffix such as " (리뷰 3건)" when more than one review statement backs a point"""
+    counts = state.get("support", {}).get(side, [])
+    if idx < len(counts) and counts[idx] > 1:
+        return f" (리뷰 {counts[idx]}건)"
+    return ""
+
+
+def has_points(state):
+    """Only results with pros or cons are worth caching"""
+    return bool(state["pros"] or state["cons"])
+
+
+def refresh_in_background(cache_key, product_name, force_crawl):
+    """Serve what we have now; recompute (or re-crawl) the result off the request path"""
+    result_cache.refresh_async(cache_key, lambda: run_search(
+        search_app, product_name, force_crawl=force_crawl, single_flight=single_flight
+    ), keep=has_points)
+
+
 # Execute search
 if search_button and product_name:
-    with st.spinner(f"'{product_name}' 검색 중..."):
+    cache_key = search_key(product_name)
+    final_state, cache_status = result_cache.get(cache_key)
+    
+    if final_state is not None:
+        # Stale-while-revalidate: answer immediately, refresh behind the scenes
+        needs_recrawl = reviews_older_than(final_state, settings.REVIEW_REFRESH_DAYS)
+        if cache_status == "stale" or needs_recrawl:
+            # A re-crawl refreshes the stored product, not a copy under the typed spelling
+            refresh_name = stored_product_name(final_state) if needs_recrawl else product_name
+            refresh_in_background(cache_key, refresh_name, force_crawl=needs_recrawl)
+    else:
         # Initialize state
-        initial_state = {
-            "product_name": product_name,
-            "search_method": "",
-            "results": {},
-            "pros": [],
-            "cons": [],
-            "sources": [],
-            "messages": [],
-            "error": "",
-            "similar_products": []
-        }
+        initial_state = create_initial_state(product_name)
+        
+        # Run workflow, rendering partial results as each blog post is analyzed
+        status = st.empty()
+        live_results = st.empty()
+        partial_pros, partial_cons, partial_sources = [], [], []
+        
+        status.info(f"⏳ '{product_name}' 검색 중...")
+        for event in stream_search(search_app, initial_state, single_flight):
+            if event["type"] == "status":
+                status.info(f"⏳ {event['content']}")
+            elif event["type"] == "source":
+                partial_sources.append(event)
+            elif event["type"] == "points":
+                partial_pros.extend(p for p in event["pros"] if p not in partial_pros)
+                partial_cons.extend(c for c in event["cons"] if c not in partial_cons)
+                render_partial_results(live_results, partial_pros, partial_cons, partial_sources)
+            elif event["type"] == "final":
+                final_state = event["state"]
         
-        # Run workflow
-        final_state = search_app.invoke(initial_state)
+        status.empty()
+        live_results.empty()
+        
+        if has_points(final_state):
+            result_cache.put(cache_key, final_state)
+            if reviews_older_than(final_state, settings.REVIEW_REFRESH_DAYS):
+                refresh_in_background(cache_key, stored_product_name(final_state), force_crawl=True)
     
     # Display results
     if final_state["pros"] or final_state["cons"]:
@@ -76,12 +161,12 @@ if search_button and product_name:
         with col1:
             st.markdown(PROS_SECTION_HTML, unsafe_allow_html=True)
             for idx, pro in enumerate(final_state["pros"][:10], 1):
-                st.write(f"{idx}. {pro}")
+                st.write(f"{idx}. {pro}{support_label(final_state, 'pros', idx - 1)}")
         
         with col2:
             st.markdown(CONS_SECTION_HTML, unsafe_allow_html=True)
             for idx, con in enumerate(final_state["cons"][:10], 1):
-                st.write(f"{idx}. {con}")
+                st.write(f"{idx}. {con}{support_label(final_state, 'cons', idx - 1)}")
         
         # Statistics
         st.markdown("---")
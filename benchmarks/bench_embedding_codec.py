@@ -0,0 +1,66 @@
+"""
+Storage size, decode speed and retrieval quality of embedding encodings
+
+Usage:
+    python -m benchmarks.bench_embedding_codec [--products N] [--queries N] [--k K]
+"""
+import argparse
+import json
+import time
+import numpy as np
+from embeddings.codec import DTYPES, decode_embedding, encode_embedding, from_pg_bytea, to_pg_bytea
+
+DIMENSIONS = 1536
+
+
+def synthetic_embeddings(count, clusters, rng):
+    """Unit vectors grouped around a few centers, like embeddings of related product names"""
+    centers = rng.standard_normal((clusters, DIMENSIONS)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, DIMENSIONS)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = synthetic_embeddings(args.products, 50, rng)
+    queries = synthetic_embeddings(args.queries, 50, rng)
+    exact = top_k(vectors, queries, args.k)
+
+    json_rows = [json.dumps(v.tolist()) for v in vectors[:500]]
+    start = time.perf_counter()
+    for row in json_rows:
+        np.asarray(json.loads(row), dtype=np.float32)
+    json_decode = (time.perf_counter() - start) / len(json_rows)
+    json_bytes = sum(len(row) for row in json_rows) / len(json_rows)
+
+    print(f"{args.products} products x {DIMENSIONS} dims, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'encoding':<12}{'bytes':>10}{'bytea hex':>12}{'decode us':>12}{'recall':>10}")
+    print(f"{'json text':<12}{json_bytes:>10.0f}{'-':>12}{json_decode * 1e6:>12.1f}{1.0:>10.3f}")
+    for dtype in DTYPES:
+        blobs = [encode_embedding(v, dtype) for v in vectors]
+        literals = [to_pg_bytea(blob) for blob in blobs[:500]]
+
+        start = time.perf_counter()
+        for literal in literals:
+            decode_embedding(from_pg_bytea(literal), dtype)
+        decode = (time.perf_counter() - start) / len(literals)
+
+        decoded = np.vstack([decode_embedding(blob, dtype) for blob in blobs]).astype(np.float32)
+        found = top_k(decoded, queries, args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact, found)])
+        print(f"{dtype:<12}{len(blobs[0]):>10}{len(literals[0]):>12}{decode * 1e6:>12.1f}{recall:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark for blog page text extraction backends
+
+Usage:
+    python -m benchmarks.bench_html_extract [PAGES_DIR] [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from bs4 import BeautifulSoup
+from crawlers.html_extract import available_backends, extract_post_text, strip_tags
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def full_soup_extract(html):
+    """The original crawl_content path: full html.parser soup, then selectors"""
+    soup = BeautifulSoup(html, 'html.parser')
+    content = ""
+    for selector in ['div.se-main-container', 'div#postViewArea', 'div.post_ct']:
+        elem = soup.select_one(selector)
+        if elem:
+            content = elem.get_text(separator='\n', strip=True)
+            break
+    if not content:
+        content = soup.get_text(separator='\n', strip=True)
+    content = re.sub(r'\s+', ' ', content)
+    return content.replace('\u200b', '')
+
+
+def full_soup_strip(text):
+    """The original remove_html_tags path"""
+    text = BeautifulSoup(text, "html.parser").get_text()
+    text = re.sub(r'<[^>]+>', '', text)
+    return text.strip()
+
+
+def timeit(func, inputs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(inputs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pages_dir', nargs='?', default=os.path.join(FIXTURES, 'pages'))
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.pages_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    if not pages:
+        raise SystemExit(f"No .html pages found in {args.pages_dir}")
+
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1024:.0f} KB total, {args.repeat} repeats\n")
+
+    baseline = timeit(full_soup_extract, pages, args.repeat)
+    expected = [full_soup_extract(page) for page in pages]
+    print(f"{'page text':<28}{'ms/page':>10}{'speedup':>10}  output")
+    print(f"{'full soup (baseline)':<28}{baseline * 1000:>10.2f}{1.0:>9.1f}x")
+    for backend in available_backends():
+        elapsed = timeit(lambda page: extract_post_text(page, backend), pages, args.repeat)
+        same = all(extract_post_text(page, backend) == text for page, text in zip(pages, expected))
+        print(f"{backend:<28}{elapsed * 1000:>10.2f}{baseline / elapsed:>9.1f}x  {'identical' if same else 'differs'}")
+
+    with open(os.path.join(FIXTURES, 'search', 'blog_search.json'), encoding='utf-8') as f:
+        snippets = [text for item in json.load(f)['items'] for text in (item['title'], item['description'])]
+    snippet_repeat = args.repeat * 50
+    baseline = timeit(full_soup_strip, snippets, snippet_repeat)
+    elapsed = timeit(strip_tags, snippets, snippet_repeat)
+    same = all(strip_tags(text) == full_soup_strip(text) for text in snippets)
+    print(f"\n{'search snippets':<28}{'us/item':>10}{'speedup':>10}  output")
+    print(f"{'full soup (baseline)':<28}{baseline * 1e6:>10.1f}{1.0:>9.1f}x")
+    print(f"{'regex strip_tags':<28}{elapsed * 1e6:>10.1f}{baseline / elapsed:>9.1f}x  {'identical' if same else 'differs'}")
+
+
+if __name__ == '__main__':
+    main()
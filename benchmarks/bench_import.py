@@ -0,0 +1,83 @@
+"""
+Import-time regression guard for the app's modules
+
+Imports each module in a fresh interpreter with `python -X importtime`, reports
+the cumulative import time and the slowest dependencies, and exits non-zero if a
+module pulls in a client library that should only load on first use, or exceeds
+the time budget.
+
+Usage:
+    python -m benchmarks.bench_import [MODULE ...] [--repeat N] [--budget-ms MS]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['config', 'embeddings', 'database', 'crawlers', 'langgraph.nodes']
+# Heavy client libraries (and .env loading) that must wait for the first request
+DEFERRED_MODULES = ['openai', 'supabase', 'dotenv']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """Returns (cumulative_us, {module: self_us}, deferred modules loaded) or raises RuntimeError"""
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative = None
+    self_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        self_times[name.strip()] = int(self_us)
+        if name.strip() == module:
+            cumulative = int(cumulative_us)
+    return cumulative, self_times, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument('--budget-ms', type=float, default=None, help="fail if any module takes longer")
+    parser.add_argument('--top', type=int, default=5, help="slowest dependencies to list")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<20}{'import ms':>10}  deferred libraries loaded / slowest dependencies (self ms)")
+    for module in args.modules:
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:<20}{'error':>10}  {e}")
+            failed = True
+            continue
+
+        cumulative, self_times, loaded = min(runs, key=lambda run: run[0])
+        slowest = sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(
+            f"{module:<20}{cumulative / 1000:>10.1f}  {loaded or '-'} / "
+            + ", ".join(f"{name} {us / 1000:.0f}" for name, us in slowest)
+        )
+        if loaded:
+            failed = True
+        if args.budget_ms is not None and cumulative / 1000 > args.budget_ms:
+            print(f"{'':<20}{'':>10}  over budget ({args.budget_ms:.0f} ms)")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
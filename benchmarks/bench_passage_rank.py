@@ -0,0 +1,90 @@
+"""
+Micro-benchmark for the extraction preview: head truncation vs local passage ranking
+
+Builds blog-like posts (intro, purchase links and unboxing before the review part)
+and reports how much of the review part each preview keeps, plus the ranking
+cost per post on the fixture pages.
+
+Usage:
+    python -m benchmarks.bench_passage_rank [--posts N] [--budget CHARS] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from crawlers.html_extract import extract_post_text
+from crawlers.passage_rank import select_passages
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+BOILERPLATE = [
+    "안녕하세요 여러분 오늘도 제 블로그에 와주셔서 감사합니다.",
+    "이 포스팅은 쿠팡 파트너스 활동의 일환으로 이에 따른 일정액의 수수료를 제공받습니다.",
+    "최저가 구매링크는 글 하단에 남겨두었으니 참고해주세요.",
+    "택배가 도착해서 바로 언박싱을 진행해봤습니다.",
+    "박스 안에는 본체와 충전기, 설명서가 들어 있었어요.",
+    "요즘 날씨가 많이 추워졌는데 다들 감기 조심하세요.",
+    "이웃추가와 공감, 댓글은 큰 힘이 됩니다.",
+]
+REVIEW = [
+    "한달 동안 실사용해보니 배터리가 하루 종일 가서 만족스러웠습니다.",
+    "장점은 화면이 밝고 색감이 좋아서 영상 볼 때 좋았어요.",
+    "단점은 고사양 게임을 돌리면 발열이 심하고 팬소음이 꽤 큽니다.",
+    "무게가 가벼워서 휴대성은 정말 좋았습니다.",
+    "키보드 타건감은 괜찮지만 터치패드가 조금 작아서 아쉬운 부분이에요.",
+    "포트가 부족해서 허브를 따로 사야 하는 점이 불편했습니다.",
+    "가격을 생각하면 성능은 충분하고 가성비가 괜찮은 편입니다.",
+]
+
+
+def make_post(rng, intro_sentences, review_sentences):
+    intro = [rng.choice(BOILERPLATE) for _ in range(intro_sentences)]
+    review = [rng.choice(REVIEW) for _ in range(review_sentences)]
+    outro = [rng.choice(BOILERPLATE) for _ in range(3)]
+    return " ".join(intro + review + outro)
+
+
+def review_share(preview):
+    """Fraction of the preview's characters that belong to review sentences"""
+    kept = sum(preview.count(sentence) * len(sentence) for sentence in REVIEW)
+    return kept / max(len(preview), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--budget', type=int, default=1500)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    posts = [make_post(rng, rng.randint(20, 60), rng.randint(8, 25)) for _ in range(args.posts)]
+    print(f"{len(posts)} synthetic posts, {sum(map(len, posts)) / len(posts):.0f} chars on average, "
+          f"budget {args.budget} chars\n")
+
+    print(f"{'preview':<20}{'review share':>14}{'no review text':>16}")
+    for name, select in (
+        ('head truncation', lambda post: post[:args.budget]),
+        ('passage ranking', lambda post: select_passages(post, "노트북", args.budget)),
+    ):
+        shares = [review_share(select(post)) for post in posts]
+        empty = sum(1 for share in shares if share == 0)
+        print(f"{name:<20}{sum(shares) / len(shares):>13.0%}{empty:>16}")
+
+    pages = [
+        extract_post_text(open(path, 'rb').read())
+        for path in sorted(glob.glob(os.path.join(FIXTURES, 'pages', '*.html')))
+    ]
+    inputs = posts + pages
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in inputs:
+            select_passages(text, "노트북", args.budget)
+    elapsed = (time.perf_counter() - start) / (args.repeat * len(inputs))
+    print(f"\nranking cost: {elapsed * 1000:.2f} ms/post")
+
+
+if __name__ == '__main__':
+    main()
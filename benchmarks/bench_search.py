@@ -0,0 +1,247 @@
+"""
+End-to-end search benchmark with record/replay service fakes
+
+Runs the LangGraph search workflow against an in-memory Supabase, fake Naver
+sessions and a fake OpenAI client, with injected latency. Scenarios: DB hit,
+similarity hit and cold crawl, each at several catalog sizes. Reports throughput,
+p50/p95/p99 latency, peak memory and the slowest traced stages.
+
+Usage:
+    python -m benchmarks.bench_search [--sizes 100 1000 10000] [--concurrency 4]
+    python -m benchmarks.bench_search --record benchmarks/fixtures/recorded  # real Naver/OpenAI credentials
+    python -m benchmarks.bench_search --replay benchmarks/fixtures/recorded
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = ('db_hit', 'similarity_hit', 'cold_crawl')
+CATALOG_BRANDS = ["맥북 프로", "맥북 에어", "그램", "갤럭시북", "씽크패드", "젠북", "비보북", "아이디어패드", "서피스 랩탑", "레전"]
+CATALOG_MODELS = ["M3", "14", "16", "프로", "울트라", "X1"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="products in the catalog")
+    parser.add_argument('--iterations', type=int, default=40, help="searches per DB scenario")
+    parser.add_argument('--crawl-iterations', type=int, default=8, help="searches per cold crawl scenario")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--vector-backend', choices=['rpc', 'local'], default='rpc')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="multiply every injected latency")
+    parser.add_argument('--supabase-ms', type=float, default=15)
+    parser.add_argument('--naver-ms', type=float, default=80)
+    parser.add_argument('--page-ms', type=float, default=150)
+    parser.add_argument('--chat-ms', type=float, default=1500)
+    parser.add_argument('--embed-ms', type=float, default=120)
+    parser.add_argument('--tracemalloc', action='store_true', help="report peak Python allocations (slows the run)")
+    parser.add_argument('--record', metavar='DIR', help="call the real Naver/OpenAI APIs and save their responses")
+    parser.add_argument('--replay', metavar='DIR', help="answer from responses saved with --record")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def prepare_environment(args, workdir):
+    """Runs before config.settings is imported: isolated caches and trace file, placeholder credentials"""
+    os.environ['CACHE_DIR'] = workdir
+    os.environ['TRACE_PATH'] = os.path.join(workdir, 'traces.jsonl')
+    os.environ['VECTOR_SEARCH_BACKEND'] = args.vector_backend
+    os.environ.setdefault('SUPABASE_URL', 'http://supabase.bench.invalid')
+    os.environ.setdefault('SUPABASE_KEY', 'bench')
+    if not args.record:
+        for key in ('OPENAI_API_KEY', 'NAVER_CLIENT_ID', 'NAVER_CLIENT_SECRET'):
+            os.environ.setdefault(key, 'bench')
+
+
+def install_fakes(args):
+    """Swap the service clients before langgraph.nodes instantiates them; returns the fakes"""
+    import database
+    import crawlers
+    from benchmarks.fakes import Cassette, FakeNaverSession, FakeOpenAI, FakeSupabase, Latency
+
+    scale = args.latency_scale
+    cassette_dir = args.record or args.replay
+    openai_cassette = Cassette(os.path.join(cassette_dir, 'openai.json') if cassette_dir else None)
+    naver_cassette = Cassette(os.path.join(cassette_dir, 'naver.json') if cassette_dir else None)
+
+    fake_db = FakeSupabase(Latency(args.supabase_ms * scale, per_row_us=2 * scale, seed=args.seed))
+    fake_openai = FakeOpenAI(
+        openai_cassette,
+        embed_latency=Latency(args.embed_ms * scale, seed=args.seed),
+        chat_latency=Latency(args.chat_ms * scale, seed=args.seed)
+    )
+
+    class BenchSupabaseClient(database.SupabaseClient):
+        def __init__(self):
+            super().__init__()
+            self.client = fake_db
+            if args.record:
+                fake_openai.upstream = self.embeddings.client
+            self.embeddings.client = fake_openai
+
+    class BenchCrawler(crawlers.ProConsLaptopCrawler):
+        def __init__(self, pool_size=None):
+            super().__init__(pool_size)
+            self.search_session = FakeNaverSession(
+                naver_cassette, self.search_session if args.record else None,
+                search_latency=Latency(args.naver_ms * scale, seed=args.seed)
+            )
+            self.blog_session = FakeNaverSession(
+                naver_cassette, self.blog_session if args.record else None,
+                page_latency=Latency(args.page_ms * scale, seed=args.seed)
+            )
+            if args.record:
+                fake_openai.upstream = self.openai_client
+            self.openai_client = fake_openai
+
+    database.SupabaseClient = BenchSupabaseClient
+    crawlers.ProConsLaptopCrawler = BenchCrawler
+    return fake_db, fake_openai, [openai_cassette, naver_cassette]
+
+
+def seed_catalog(fake_db, fake_openai, size, rng):
+    """Fill the fake tables with `size` products, ten statements each; returns the product names"""
+    from benchmarks.fakes import SYNTHETIC_CONS, SYNTHETIC_PROS
+    from config import settings
+    from embeddings.codec import encode_embedding, to_pg_bytea
+    from utils.normalize import normalize_product_name
+
+    # One encoded embedding per distinct statement, shared by every row that uses it
+    statement_embeddings = {
+        text: to_pg_bytea(encode_embedding(fake_openai.synthetic_embedding(text), settings.EMBEDDING_STORAGE_DTYPE))
+        for text in SYNTHETIC_PROS + SYNTHETIC_CONS
+    }
+
+    fake_db.clear()
+    names = [f"{rng.choice(CATALOG_BRANDS)} {rng.choice(CATALOG_MODELS)}-{i:05d}" for i in range(size)]
+    rows = []
+    for name in names:
+        for kind, pool, count in (('pro', SYNTHETIC_PROS, 5), ('con', SYNTHETIC_CONS, 5)):
+            for text in rng.sample(pool, count):
+                rows.append({
+                    'product_name': name,
+                    'type': kind,
+                    'content': text,
+                    'content_embedding': statement_embeddings[text],
+                    'content_embedding_dtype': settings.EMBEDDING_STORAGE_DTYPE
+                })
+    fake_db.load('laptop_pros_cons', rows)
+    fake_db.load('product_embeddings', [
+        {'product_name': name, 'embedding': fake_openai.synthetic_embedding(name)} for name in names
+    ])
+    fake_db.load('product_aliases', [
+        {'alias_key': normalize_product_name(name), 'product_name': name, 'source': 'product'} for name in names
+    ])
+    return names
+
+
+def scenario_queries(scenario, names, count, rng):
+    if scenario == 'db_hit':
+        return [rng.choice(names) for _ in range(count)]
+    if scenario == 'similarity_hit':
+        # Distinct products, spelled so neither the exact, alias nor partial tier matches
+        return [f"{name} 노트북 후기" for name in rng.sample(names, min(count, len(names)))]
+    return [f"cold-{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}" for _ in range(count)]
+
+
+def run_scenario(args, scenario, queries, search_app):
+    from langgraph.workflow import run_search
+    from utils.tracing import percentile, tracer
+
+    def timed(query):
+        start = time.perf_counter()
+        state = run_search(search_app, query)
+        return time.perf_counter() - start, state.get("search_method") or "none"
+
+    tracer.reset()
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(timed, queries))
+    wall = time.perf_counter() - start
+    peak_alloc = None
+    if args.tracemalloc:
+        peak_alloc = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies = sorted(elapsed for elapsed, _ in outcomes)
+    methods = {}
+    for _, method in outcomes:
+        methods[method] = methods.get(method, 0) + 1
+    stages = sorted(
+        ((name, stats) for name, stats in tracer.summary().items() if stats['kind'] != 'node'),
+        key=lambda item: item[1]['p95'], reverse=True
+    )
+    return {
+        'searches': len(queries),
+        'throughput': len(queries) / wall,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'methods': methods,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+        'peak_alloc_mb': peak_alloc / 2 ** 20 if peak_alloc is not None else None,
+        'slowest_stages': [(name, round(stats['p95'] * 1000, 1)) for name, stats in stages[:3]]
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='bench_search_')
+    prepare_environment(args, workdir)
+
+    fake_db, fake_openai, cassettes = install_fakes(args)
+    from database import ProductVectorIndex
+    from langgraph import nodes
+    from langgraph.workflow import create_search_workflow
+
+    search_app = create_search_workflow()
+    rng = random.Random(args.seed)
+    mode = 'record' if args.record else 'replay' if args.replay else 'synthetic'
+    print(f"{mode} services, latency x{args.latency_scale}, concurrency {args.concurrency}, "
+          f"vector backend {args.vector_backend}, caches in {workdir}\n")
+    print(f"{'scenario':<16}{'products':>9}{'n':>5}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'rss MB':>8}  methods / slowest stages (p95 ms)")
+
+    results = []
+    try:
+        for size in args.sizes:
+            names = seed_catalog(fake_db, fake_openai, size, rng)
+            nodes.supabase_client.index = ProductVectorIndex()
+            for scenario in args.scenarios:
+                count = args.crawl_iterations if scenario == 'cold_crawl' else args.iterations
+                queries = scenario_queries(scenario, names, count, rng)
+                result = run_scenario(args, scenario, queries, search_app)
+                result.update(scenario=scenario, products=size)
+                results.append(result)
+
+                alloc = f", alloc peak {result['peak_alloc_mb']:.0f} MB" if result['peak_alloc_mb'] is not None else ""
+                print(
+                    f"{scenario:<16}{size:>9}{result['searches']:>5}{result['throughput']:>8.1f}"
+                    f"{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}{result['p99_ms']:>9.0f}"
+                    f"{result['peak_rss_mb']:>8.0f}  {result['methods']} "
+                    f"{result['slowest_stages']}{alloc}"
+                )
+    finally:
+        if args.record:
+            for cassette in cassettes:
+                cassette.save()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
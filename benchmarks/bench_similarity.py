@@ -0,0 +1,66 @@
+"""
+Per-row cosine_similarity loop vs the vectorized top-k API
+
+Usage:
+    python -m benchmarks.bench_similarity [--sizes 1000 10000 100000] [--dims 1536] [--k 5]
+"""
+import argparse
+import time
+import numpy as np
+from embeddings import OpenAIEmbeddings
+
+
+def loop_top_k(query, rows, k):
+    """The per-row path: cosine_similarity on every product, then sort"""
+    scores = [(i, OpenAIEmbeddings.cosine_similarity(query, row)) for i, row in enumerate(rows)]
+    scores.sort(key=lambda item: item[1], reverse=True)
+    return scores[:k]
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--dims', type=int, default=1536)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=32, help="queries per batched call")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{args.dims} dims, top-{args.k}\n")
+    print(f"{'products':>10}{'loop ms':>12}{'topk ms':>12}{'speedup':>10}{'batch ms/q':>12}  same")
+    for size in args.sizes:
+        matrix = rng.standard_normal((size, args.dims), dtype=np.float32)
+        queries = rng.standard_normal((args.batch, args.dims), dtype=np.float32)
+        query = queries[0]
+
+        loop_time, expected = best_of(lambda: loop_top_k(query, matrix, args.k), 1 if size > 10000 else 3)
+
+        # The matrix is normalized once up front, as ProductVectorIndex keeps it
+        normalized = OpenAIEmbeddings.normalize(matrix)
+        unit_query = OpenAIEmbeddings.normalize(query)
+        topk_time, found = best_of(
+            lambda: OpenAIEmbeddings.top_k_similar(unit_query, normalized, args.k, normalized=True), 5
+        )
+        unit_queries = OpenAIEmbeddings.normalize(queries)
+        batch_time, _ = best_of(
+            lambda: OpenAIEmbeddings.top_k_similar(unit_queries, normalized, args.k, normalized=True), 3
+        )
+
+        same = [i for i, _ in expected] == [i for i, _ in found]
+        print(
+            f"{size:>10}{loop_time * 1000:>12.1f}{topk_time * 1000:>12.2f}{loop_time / topk_time:>9.0f}x"
+            f"{batch_time * 1000 / args.batch:>12.2f}  {'yes' if same else 'no'}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+"""
+Record/replay stand-ins for Supabase, Naver and OpenAI used by the offline benchmarks
+
+Each fake answers from a cassette (responses recorded from the real service) when it
+has one, and otherwise from deterministic synthetic data, after an injected latency.
+Given an `upstream` client, the OpenAI and Naver fakes call it instead and record
+what it returns.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+from urllib.parse import urlencode, urlparse
+import numpy as np
+from embeddings import OpenAIEmbeddings
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Statements returned by the synthetic chat model; several are near-duplicates on purpose
+SYNTHETIC_PROS = [
+    "배터리가 오래 가서 외부에서 쓰기 좋음",
+    "배터리 수명이 길어서 충전 걱정이 없음",
+    "화면이 밝고 선명함",
+    "디스플레이 밝기가 충분하고 선명함",
+    "키보드 타건감이 좋음",
+    "무게가 가벼워 휴대성이 좋음",
+    "가벼워서 들고 다니기 편함",
+    "성능이 빨라 영상 편집도 무난함",
+    "스피커 음질이 좋은 편",
+    "디자인이 깔끔하고 고급스러움",
+]
+SYNTHETIC_CONS = [
+    "가격이 비싼 편이라 부담됨",
+    "가격대가 높아 부담스러움",
+    "고사양 작업 시 발열이 있음",
+    "게임할 때 발열이 심한 편",
+    "포트가 부족해 허브가 필요함",
+    "팬 소음이 거슬리는 편",
+    "무게가 생각보다 무거움",
+    "터치패드 반응이 아쉬움",
+]
+
+
+class Latency:
+    """Injected service latency: base milliseconds +/- jitter, plus a per-row cost"""
+
+    def __init__(self, base_ms=0.0, jitter=0.2, per_row_us=0.0, seed=None):
+        self.base_ms = base_ms
+        self.jitter = jitter
+        self.per_row_us = per_row_us
+        self._random = random.Random(seed)
+
+    def wait(self, rows=0):
+        delay = self.base_ms / 1000 * (1 + self.jitter * (2 * self._random.random() - 1))
+        delay += rows * self.per_row_us / 1e6
+        if delay > 0:
+            time.sleep(delay)
+
+
+def request_key(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """Recorded responses keyed by request, persisted as one JSON file"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+
+
+# --- Supabase ---------------------------------------------------------------
+
+class _Query:
+    """The subset of the PostgREST query builder SupabaseClient uses"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = None
+        self.filters = []
+        self.offset = 0
+        self.count = None
+        self.write = None
+
+    def select(self, columns="*"):
+        columns = [c.strip() for c in columns.split(',')]
+        self.columns = None if columns == ['*'] else columns
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def ilike(self, column, pattern):
+        regex = re.compile('^' + '.*'.join(re.escape(part) for part in pattern.split('%')) + '$', re.I | re.S)
+        self.filters.append(('ilike', column, regex))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(('in', column, set(values)))
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(('is', column, None if value == 'null' else value))
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.count = end - start + 1
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def upsert(self, rows, on_conflict='', ignore_duplicates=False):
+        self.write = (rows if isinstance(rows, list) else [rows], on_conflict, ignore_duplicates)
+        return self
+
+    def execute(self):
+        return self.db._execute(self)
+
+
+class _Rpc:
+    def __init__(self, db, name, params):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        return self.db._rpc(self.name, self.params)
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the Supabase client: tables, upserts, the filters the
+    app uses, and the match_products / search_product_tiers RPCs. Equality filters
+    use hash indexes so lookups scale like the real indexed columns.
+    """
+
+    UNIQUE_KEYS = {
+        'laptop_pros_cons': ('product_name', 'type', 'content'),
+        'product_embeddings': ('product_name',),
+        'product_aliases': ('alias_key',),
+    }
+    ROW_COLUMNS = ('id', 'product_name', 'type', 'content', 'support', 'created_at')
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+        self._lock = threading.RLock()
+        self.requests = 0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.tables = {table: [] for table in self.UNIQUE_KEYS}
+            self._unique = {table: {} for table in self.UNIQUE_KEYS}
+            self._indexes = {}
+            self._matrix = None
+            self._next_id = 1
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, params):
+        return _Rpc(self, name, params)
+
+    def load(self, table, rows):
+        """Seed a table without injected latency"""
+        with self._lock:
+            self._upsert(table, rows, ','.join(self.UNIQUE_KEYS[table]), ignore_duplicates=True)
+
+    def _index(self, table, column):
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = {}
+            for position, row in enumerate(self.tables[table]):
+                index.setdefault(row.get(column), []).append(position)
+            self._indexes[(table, column)] = index
+        return index
+
+    def _upsert(self, table, rows, on_conflict, ignore_duplicates):
+        keys = tuple(c.strip() for c in on_conflict.split(',')) if on_conflict else self.UNIQUE_KEYS[table]
+        unique = self._unique[table] if keys == self.UNIQUE_KEYS[table] else None
+        stored = self.tables[table]
+        for row in rows:
+            key = tuple(row.get(c) for c in keys)
+            position = unique.get(key) if unique is not None else None
+            if position is not None:
+                if not ignore_duplicates:
+                    stored[position].update(row)
+                continue
+            row = dict(row)
+            if table == 'laptop_pros_cons':
+                row.setdefault('id', self._next_id)
+                row.setdefault('created_at', time.strftime('%Y-%m-%dT%H:%M:%S'))
+                self._next_id += 1
+            position = len(stored)
+            stored.append(row)
+            if unique is not None:
+                unique[key] = position
+            for (indexed_table, column), index in self._indexes.items():
+                if indexed_table == table:
+                    index.setdefault(row.get(column), []).append(position)
+        if table == 'product_embeddings':
+            self._matrix = None
+
+    def _candidates(self, table, filters):
+        for kind, column, value in filters:
+            if kind == 'eq':
+                return [self.tables[table][p] for p in self._index(table, column).get(value, [])]
+        return self.tables[table]
+
+    @staticmethod
+    def _matches(row, filters):
+        for kind, column, value in filters:
+            field = row.get(column)
+            if kind == 'eq' and field != value:
+                return False
+            if kind == 'ilike' and (field is None or not value.match(field)):
+                return False
+            if kind == 'in' and field not in value:
+                return False
+            if kind == 'is' and field is not value:
+                return False
+        return True
+
+    def _execute(self, query):
+        with self._lock:
+            self.requests += 1
+            if query.write is not None:
+                rows, on_conflict, ignore_duplicates = query.write
+                self._upsert(query.table, rows, on_conflict, ignore_duplicates)
+                data = rows
+            else:
+                rows = [row for row in self._candidates(query.table, query.filters) if self._matches(row, query.filters)]
+                end = None if query.count is None else query.offset + query.count
+                rows = rows[query.offset:end]
+                if query.columns is None:
+                    data = [dict(row) for row in rows]
+                else:
+                    data = [{c: row.get(c) for c in query.columns} for row in rows]
+        self.latency.wait(len(data))
+        return SimpleNamespace(data=data, count=None)
+
+    def _product_matrix(self):
+        if self._matrix is None:
+            rows = self.tables['product_embeddings']
+            names = [row['product_name'] for row in rows]
+            vectors = [row['embedding'] for row in rows]
+            matrix = OpenAIEmbeddings.normalize(np.vstack(vectors)) if vectors else None
+            self._matrix = (names, matrix)
+        return self._matrix
+
+    def _rpc(self, name, params):
+        with self._lock:
+            self.requests += 1
+            if name == 'match_products':
+                names, matrix = self._product_matrix()
+                data = []
+                if matrix is not None:
+                    query = OpenAIEmbeddings.normalize(params['query_embedding'])
+                    for position, score in OpenAIEmbeddings.top_k_similar(
+                        query, matrix, k=params['match_count'], threshold=params['match_threshold'], normalized=True
+                    ):
+                        data.append({'product_name': names[position], 'similarity': score})
+            elif name == 'search_product_tiers':
+                data = self._search_product_tiers(params['query'], params.get('query_key'))
+            else:
+                raise ValueError(f"Unknown RPC: {name}")
+        self.latency.wait(len(data))
+        return SimpleNamespace(data=data, count=None)
+
+    def _tier_rows(self, tier, rows, source=None):
+        return [dict({c: row.get(c) for c in self.ROW_COLUMNS}, tier=tier, source=source) for row in rows]
+
+    def _search_product_tiers(self, query, query_key):
+        exact = self._candidates('laptop_pros_cons', [('eq', 'product_name', query)])
+        if exact:
+            return self._tier_rows('exact', exact)
+        if query_key is not None:
+            aliases = self._candidates('product_aliases', [('eq', 'alias_key', query_key)])
+            rows = [
+                row for alias in aliases
+                for row in self._candidates('laptop_pros_cons', [('eq', 'product_name', alias['product_name'])])
+            ]
+            if rows:
+                return self._tier_rows('alias', rows, aliases[0].get('source'))
+        needle = query.lower()
+        return self._tier_rows('partial', [
+            row for row in self.tables['laptop_pros_cons'] if needle in row['product_name'].lower()
+        ])
+
+
+# --- OpenAI -----------------------------------------------------------------
+
+class FakeOpenAI:
+    """
+    Embeddings and chat completions with the response shapes the app reads.
+
+    Synthetic embeddings sum hashed character-trigram vectors, so similar strings get
+    similar vectors. Synthetic chat answers pick statements from SYNTHETIC_PROS /
+    SYNTHETIC_CONS deterministically per review text.
+    """
+
+    def __init__(self, cassette=None, upstream=None, embed_latency=None, chat_latency=None, dimensions=1536):
+        self.cassette = cassette or Cassette()
+        self.upstream = upstream
+        self.embed_latency = embed_latency or Latency()
+        self.chat_latency = chat_latency or Latency()
+        self.dimensions = dimensions
+        self._grams = {}
+        self._lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat))
+
+    def _gram_vector(self, gram):
+        with self._lock:
+            vector = self._grams.get(gram)
+            if vector is None:
+                rng = np.random.default_rng(zlib.crc32(gram.encode('utf-8')))
+                vector = self._grams[gram] = rng.standard_normal(self.dimensions).astype(np.float32)
+            return vector
+
+    def synthetic_embedding(self, text):
+        text = re.sub(r'\s+', '', text.lower()) or ' '
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for i in range(max(len(text) - 2, 1)):
+            vector += self._gram_vector(text[i:i + 3])
+        return OpenAIEmbeddings.normalize(vector)
+
+    def _create_embeddings(self, input, model, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        if self.upstream is not None:
+            response = self.upstream.embeddings.create(input=texts, model=model, **kwargs)
+            vectors = [item.embedding for item in response.data]
+            for text, vector in zip(texts, vectors):
+                self.cassette.put(request_key('embedding', model, text), vector)
+        else:
+            self.embed_latency.wait(len(texts))
+            vectors = []
+            for text in texts:
+                vector = self.cassette.get(request_key('embedding', model, text))
+                vectors.append(vector if vector is not None else self.synthetic_embedding(text).tolist())
+        tokens = sum(len(text) for text in texts)
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=vector, index=i) for i, vector in enumerate(vectors)],
+            usage=SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens)
+        )
+
+    @staticmethod
+    def _pick(pool, text, count):
+        seed = zlib.crc32(text.encode('utf-8'))
+        return random.Random(seed).sample(pool, count)
+
+    def _synthetic_answer(self, prompt, json_mode):
+        if json_mode:
+            parts = re.split(r'\[리뷰 (\d+)\]\n', prompt)
+            results = [
+                {'source': int(index), 'pros': self._pick(SYNTHETIC_PROS, body, 3), 'cons': self._pick(SYNTHETIC_CONS, body, 2)}
+                for index, body in zip(parts[1::2], parts[2::2])
+            ]
+            return json.dumps({'results': results}, ensure_ascii=False)
+        pros = self._pick(SYNTHETIC_PROS, prompt, 3)
+        cons = self._pick(SYNTHETIC_CONS, prompt, 2)
+        return "장점:\n" + "\n".join(f"- {p}" for p in pros) + "\n\n단점:\n" + "\n".join(f"- {c}" for c in cons)
+
+    def _create_chat(self, model, messages, **kwargs):
+        json_mode = (kwargs.get('response_format') or {}).get('type') == 'json_object'
+        key = request_key('chat', model, messages, json_mode)
+        if self.upstream is not None:
+            response = self.upstream.chat.completions.create(model=model, messages=messages, **kwargs)
+            choice = response.choices[0]
+            recorded = {
+                'content': choice.message.content,
+                'finish_reason': choice.finish_reason,
+                'prompt_tokens': response.usage.prompt_tokens,
+                'completion_tokens': response.usage.completion_tokens
+            }
+            self.cassette.put(key, recorded)
+        else:
+            self.chat_latency.wait()
+            recorded = self.cassette.get(key)
+            if recorded is None:
+                prompt = messages[-1]['content']
+                content = self._synthetic_answer(prompt, json_mode)
+                recorded = {
+                    'content': content,
+                    'finish_reason': 'stop',
+                    'prompt_tokens': sum(len(m['content']) for m in messages),
+                    'completion_tokens': len(content)
+                }
+        return SimpleNamespace(
+            choices=[SimpleNamespace(
+                message=SimpleNamespace(content=recorded['content']),
+                finish_reason=recorded['finish_reason']
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=recorded['prompt_tokens'],
+                completion_tokens=recorded['completion_tokens'],
+                total_tokens=recorded['prompt_tokens'] + recorded['completion_tokens']
+            )
+        )
+
+
+# --- Naver ------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeNaverSession:
+    """
+    requests.Session stand-in for the Naver search API and mobile blog pages.
+
+    Synthetic search results reuse fixtures/search/blog_search.json with post numbers
+    derived from the query, so every product gets its own (uncached) posts; pages
+    cycle through fixtures/pages/*.html.
+    """
+
+    def __init__(self, cassette=None, upstream=None, search_latency=None, page_latency=None, fixtures=FIXTURES):
+        self.cassette = cassette or Cassette()
+        self.upstream = upstream
+        self.search_latency = search_latency or Latency()
+        self.page_latency = page_latency or Latency()
+        self.headers = {}
+        with open(os.path.join(fixtures, 'search', 'blog_search.json'), encoding='utf-8') as f:
+            self._search = json.load(f)
+        pages_dir = os.path.join(fixtures, 'pages')
+        self._pages = []
+        for name in sorted(os.listdir(pages_dir)):
+            if name.endswith('.html'):
+                with open(os.path.join(pages_dir, name), 'rb') as f:
+                    self._pages.append(f.read())
+
+    def _synthetic_search(self, params):
+        query = params.get('query', '')
+        base = zlib.crc32(query.encode('utf-8')) * 100
+        items = []
+        for i, item in enumerate(self._search['items'][:int(params.get('display', 10))]):
+            item = dict(item)
+            item['link'] = f"https://blog.naver.com/{item['bloggerlink'].rsplit('/', 1)[-1]}/{base + i}"
+            items.append(item)
+        body = dict(self._search, items=items, display=len(items))
+        return FakeResponse(200, json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+    def get(self, url, params=None, headers=None, timeout=None, **kwargs):
+        key = request_key('get', url + ('?' + urlencode(sorted(params.items())) if params else ''))
+        is_search = urlparse(url).netloc == 'openapi.naver.com'
+
+        if self.upstream is not None:
+            response = self.upstream.get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+            if response.status_code == 200:
+                self.cassette.put(key, {
+                    'status': response.status_code,
+                    'body': response.content.decode('utf-8', errors='replace'),
+                    'headers': {k: v for k, v in response.headers.items() if k in ('ETag', 'Last-Modified')}
+                })
+            return response
+
+        (self.search_latency if is_search else self.page_latency).wait()
+        recorded = self.cassette.get(key)
+        if recorded is not None:
+            return FakeResponse(recorded['status'], recorded['body'].encode('utf-8'), recorded['headers'])
+        if is_search:
+            return self._synthetic_search(params or {})
+        etag = f'"{zlib.crc32(url.encode("utf-8")):x}"'
+        if headers and headers.get('If-None-Match') == etag:
+            return FakeResponse(304, headers={'ETag': etag})
+        page = self._pages[zlib.crc32(url.encode('utf-8')) % len(self._pages)]
+        return FakeResponse(200, page, {'ETag': etag})
+
+    def mount(self, prefix, adapter):
+        pass
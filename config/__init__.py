@@ -1 +1,6 @@
-from .settings import *
+from . import settings
+
+
+def __getattr__(name):
+    # `from config import SUPABASE_URL` keeps working without loading settings at import
+    return getattr(settings, name)
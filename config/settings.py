@@ -1,33 +1,155 @@
 """
 Application configuration settings
+
+Settings are read from the environment (and .env) on first attribute access, so
+importing this module has no side effects.
 """
 import os
-from dotenv import load_dotenv
+import threading
+
+_lock = threading.Lock()
+_loaded = False
+
+
+def _read_settings():
+    """Load .env and return every setting"""
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Supabase Configuration
+    SUPABASE_URL = os.getenv("SUPABASE_URL")
+    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+    # OpenAI Configuration
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+    # Naver API Configuration
+    NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
+    NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
+
+    # LangSmith Configuration (Optional)
+    LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
+
+    # LangSmith setup
+    if LANGSMITH_API_KEY:
+        os.environ["LANGCHAIN_TRACING_V2"] = "true"
+        os.environ["LANGCHAIN_PROJECT"] = "smart-shopping-app"
+        os.environ["LANGCHAIN_API_KEY"] = LANGSMITH_API_KEY
+    else:
+        os.environ["LANGCHAIN_TRACING_V2"] = "false"
+
+    # OpenAI Embedding Model
+    EMBEDDING_MODEL = "text-embedding-ada-002"
+
+    # Embedding request limits: inputs per request and (estimated) tokens per request
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "1000"))
+    EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+
+    # Local cache directory (embedding cache, etc.)
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+    # Embedding cache: in-memory LRU size and on-disk SQLite file (empty path disables disk tier)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+
+    # Chat model used to extract pros/cons from blog posts
+    EXTRACTION_MODEL = "gpt-3.5-turbo"
+
+    # Characters of each post sent for extraction; longer posts keep their highest-ranked passages
+    EXTRACTION_CONTENT_BUDGET = int(os.getenv("EXTRACTION_CONTENT_BUDGET", "1500"))
+
+    # Batched extraction: pack up to GPT_BATCH_MAX_POSTS posts into one request within the token budget
+    GPT_BATCH_MODE = os.getenv("GPT_BATCH_MODE", "true").lower() == "true"
+    GPT_BATCH_MAX_POSTS = int(os.getenv("GPT_BATCH_MAX_POSTS", "6"))
+    GPT_BATCH_TOKEN_BUDGET = int(os.getenv("GPT_BATCH_TOKEN_BUDGET", "6000"))
+
+    # Binary embedding storage format: "float32", "float16" or "int8" (see benchmarks/bench_embedding_codec.py)
+    EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+
+    # Vector search backend: "rpc" (pgvector match_products) or "local" (in-process index)
+    VECTOR_SEARCH_BACKEND = os.getenv("VECTOR_SEARCH_BACKEND", "rpc")
+
+    # Crawl pipeline concurrency and per-host rate limits
+    CRAWL_MAX_WORKERS = int(os.getenv("CRAWL_MAX_WORKERS", "8"))
+    CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "3"))
+    CRAWL_REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", "5"))
+
+    # Adaptive crawl budget: stop at REVIEW_TOP_N distinct pros and cons or after the deadline
+    # (seconds, 0 disables; running extractions get the grace period to finish), skip search
+    # results whose snippet scores below the relevance threshold, and replace unproductive
+    # posts up to CRAWL_MAX_POSTS fetches
+    CRAWL_DEADLINE_SECONDS = float(os.getenv("CRAWL_DEADLINE_SECONDS", "25"))
+    CRAWL_DEADLINE_GRACE_SECONDS = float(os.getenv("CRAWL_DEADLINE_GRACE_SECONDS", "5"))
+    CRAWL_MIN_SNIPPET_RELEVANCE = float(os.getenv("CRAWL_MIN_SNIPPET_RELEVANCE", "0.5"))
+    CRAWL_MAX_POSTS = int(os.getenv("CRAWL_MAX_POSTS", "12"))
+    CRAWL_SEARCH_DISPLAY = int(os.getenv("CRAWL_SEARCH_DISPLAY", "10"))
+
+    # HTTP session pooling, timeouts (seconds) and retry policy for the crawler
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+    # Crawled page cache (extracted text), TTL in seconds
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(CACHE_DIR, "pages.sqlite3"))
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600)))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+
+    # GPT extraction result cache
+    EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", os.path.join(CACHE_DIR, "extractions.sqlite3"))
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+
+    # HTML parser for crawled pages: "auto" (fastest installed), "selectolax", "lxml" or "bs4"
+    HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "auto")
+
+    # Single-flight search coalescing: cross-process lease file and lease TTL (seconds)
+    SINGLEFLIGHT_LEASE_PATH = os.getenv("SINGLEFLIGHT_LEASE_PATH", os.path.join(CACHE_DIR, "leases.sqlite3"))
+    SINGLEFLIGHT_LEASE_TTL = float(os.getenv("SINGLEFLIGHT_LEASE_TTL", "120"))
+
+    # Final result cache: entries are fresh for RESULT_CACHE_TTL seconds and served stale
+    # (with a background refresh) until RESULT_CACHE_STALE_TTL. DB results whose newest
+    # review is older than REVIEW_REFRESH_DAYS trigger a background re-crawl.
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "600"))
+    RESULT_CACHE_STALE_TTL = int(os.getenv("RESULT_CACHE_STALE_TTL", str(24 * 3600)))
+    REVIEW_REFRESH_DAYS = int(os.getenv("REVIEW_REFRESH_DAYS", "30"))
 
-# Load environment variables
-load_dotenv()
+    # Bulk ingestion: rows per upsert request, retries per chunk on transient errors, and
+    # failed chunks in a row after which the rest of a table's rows are not attempted
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "500"))
+    INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+    INGEST_MAX_CONSECUTIVE_FAILURES = int(os.getenv("INGEST_MAX_CONSECUTIVE_FAILURES", "3"))
 
-# Supabase Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    # Review statements: near-duplicates above this cosine similarity are merged, and the
+    # REVIEW_TOP_N best-supported points per side are returned
+    STATEMENT_SIMILARITY_THRESHOLD = float(os.getenv("STATEMENT_SIMILARITY_THRESHOLD", "0.9"))
+    REVIEW_TOP_N = int(os.getenv("REVIEW_TOP_N", "10"))
 
-# OpenAI Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # Local tracing (utils/tracing.py): per-span histograms in memory, spans appended to TRACE_PATH
+    # (empty to disable the file), which rotates to TRACE_PATH.1 past TRACE_MAX_BYTES;
+    # summarize with `python -m utils.tracing`
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(CACHE_DIR, "traces.jsonl"))
+    TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(20 * 2 ** 20)))
+    
+    return {name: value for name, value in locals().items() if name.isupper()}
 
-# Naver API Configuration
-NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
-NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 
-# LangSmith Configuration (Optional)
-LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
+def load():
+    """Read the settings now (idempotent)"""
+    global _loaded
+    with _lock:
+        if not _loaded:
+            globals().update(_read_settings())
+            _loaded = True
 
-# LangSmith setup
-if LANGSMITH_API_KEY:
-    os.environ["LANGCHAIN_TRACING_V2"] = "true"
-    os.environ["LANGCHAIN_PROJECT"] = "smart-shopping-app"
-    os.environ["LANGCHAIN_API_KEY"] = LANGSMITH_API_KEY
-else:
-    os.environ["LANGCHAIN_TRACING_V2"] = "false"
 
-# OpenAI Embedding Model
-EMBEDDING_MODEL = "text-embedding-ada-002"
+def __getattr__(name):
+    if name.isupper() and not _loaded:
+        load()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1,3 @@
 from .naver_crawler import ProConsLaptopCrawler
+from .pipeline import CrawlPipeline
+from .crawl_budget import CrawlBudget
@@ -0,0 +1,170 @@
+"""
+Adaptive crawl budget: when a crawl has enough, and which posts are worth fetching
+"""
+import math
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import settings
+from .passage_rank import snippet_relevance
+
+# Points per side a post is assumed to add before any post has been extracted
+EXPECTED_POINTS_PER_POST = 3
+
+
+class CrawlBudget:
+    """
+    Tracks one crawl against its goals.
+
+    The crawl is done once `target_points` distinct pros and cons have been
+    extracted or `deadline` seconds have passed. Points count as distinct by the
+    same rule collect_reviews merges them with: with an `embed` function
+    (texts -> embeddings), a point within STATEMENT_SIMILARITY_THRESHOLD of an
+    earlier one on the same side is a repeat; without one, only identical text is.
+    Search results whose snippet scores below `min_relevance` are not fetched, and
+    posts keep being fetched while it is short of the target and recent posts
+    mostly add new points, up to `max_posts` in total.
+    """
+
+    def __init__(self, product_name, target_points=None, deadline=None, min_relevance=None, max_posts=None,
+                 embed=None):
+        self.product_name = product_name
+        self.target_points = target_points or settings.REVIEW_TOP_N
+        self.deadline = settings.CRAWL_DEADLINE_SECONDS if deadline is None else deadline
+        self.min_relevance = settings.CRAWL_MIN_SNIPPET_RELEVANCE if min_relevance is None else min_relevance
+        self.max_posts = max_posts or settings.CRAWL_MAX_POSTS
+        self.threshold = settings.STATEMENT_SIMILARITY_THRESHOLD
+        self.embed = embed
+        self.started = time.monotonic()
+        # Per side: normalized texts seen and unit vectors of the distinct points
+        self._sides = {side: {'keys': set(), 'vectors': [], 'count': 0} for side in ('pros', 'cons')}
+        self._vectors = {}
+        self._lock = threading.Lock()
+        self.posts_fetched = 0
+        self.posts_extracted = 0
+        self.posts_skipped = 0
+        self.posts_wasted = 0
+        self.posts_redundant = 0
+        # New distinct points added by the most recent extractions
+        self.recent_yield = deque(maxlen=3)
+
+    def start(self):
+        """Restart the deadline clock"""
+        self.started = time.monotonic()
+
+    @staticmethod
+    def _key(point):
+        return " ".join(point.lower().split())
+
+    def is_relevant(self, post):
+        """Whether a search result's title + description look like a review of this product"""
+        text = f"{post.get('title', '')} {post.get('description', '')}"
+        if snippet_relevance(text, self.product_name) >= self.min_relevance:
+            return True
+        self.posts_skipped += 1
+        return False
+
+    def embed_points(self, results):
+        """
+        Embed the points of an extraction batch ahead of record(); called from the
+        extraction worker so the scheduling thread never waits on the API.
+        """
+        if self.embed is None:
+            return
+        with self._lock:
+            texts = list(dict.fromkeys(
+                point for pros_cons in results if pros_cons
+                for point in pros_cons['pros'] + pros_cons['cons']
+                if point not in self._vectors
+            ))
+        if not texts:
+            return
+        try:
+            embeddings = self.embed(texts)
+        except Exception as e:
+            print(f"Crawl budget embedding error: {e}")
+            return
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                if embedding is not None:
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    norm = np.linalg.norm(vector)
+                    if norm:
+                        self._vectors[text] = vector / norm
+
+    def _add_point(self, side, point):
+        """Whether `point` is new on its side; remembers it if so"""
+        state = self._sides[side]
+        key = self._key(point)
+        if key in state['keys']:
+            return False
+        state['keys'].add(key)
+        with self._lock:
+            vector = self._vectors.get(point)
+        if vector is not None and state['vectors']:
+            if float(np.max(np.stack(state['vectors']) @ vector)) >= self.threshold:
+                return False
+        if vector is not None:
+            state['vectors'].append(vector)
+        state['count'] += 1
+        return True
+
+    def record(self, pros_cons):
+        """Count an extraction result; returns the number of new distinct points"""
+        self.posts_extracted += 1
+        if not pros_cons:
+            self.posts_wasted += 1
+            return 0
+        added = sum(self._add_point('pros', point) for point in pros_cons['pros'])
+        added += sum(self._add_point('cons', point) for point in pros_cons['cons'])
+        if not added:
+            self.posts_redundant += 1
+        self.recent_yield.append(added)
+        return added
+
+    def productive(self):
+        """Whether most of the recent posts still added new points"""
+        return sum(1 for added in self.recent_yield if added) * 2 > len(self.recent_yield)
+
+    def posts_needed(self):
+        """Rough number of further extracted posts needed to reach the target (at least 1)"""
+        pros, cons = self._sides['pros']['count'], self._sides['cons']['count']
+        missing = max(self.target_points - pros, self.target_points - cons, 0)
+        if self.posts_extracted:
+            per_post = (pros + cons) / (2 * self.posts_extracted)
+        else:
+            per_post = EXPECTED_POINTS_PER_POST
+        return max(1, min(math.ceil(missing / max(per_post, 0.5)), self.max_posts))
+
+    def can_fetch(self):
+        return self.posts_fetched < self.max_posts
+
+    def satisfied(self):
+        return min(self._sides['pros']['count'], self._sides['cons']['count']) >= self.target_points
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one"""
+        if not self.deadline:
+            return None
+        return max(self.deadline - (time.monotonic() - self.started), 0.0)
+
+    def stop_reason(self):
+        """'enough_points', 'deadline' or None while the crawl should continue"""
+        if self.satisfied():
+            return 'enough_points'
+        if self.remaining() == 0:
+            return 'deadline'
+        return None
+
+    def stats(self):
+        return {
+            'distinct_pros': self._sides['pros']['count'],
+            'distinct_cons': self._sides['cons']['count'],
+            'posts_fetched': self.posts_fetched,
+            'posts_extracted': self.posts_extracted,
+            'posts_skipped': self.posts_skipped,
+            'posts_wasted': self.posts_wasted,
+            'posts_redundant': self.posts_redundant,
+            'elapsed': round(time.monotonic() - self.started, 3)
+        }
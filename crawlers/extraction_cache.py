@@ -0,0 +1,83 @@
+"""
+Persistent memo cache for GPT pros/cons extraction results
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ExtractionCache:
+    """SQLite cache of parsed {'pros','cons'} results with LRU eviction"""
+
+    def __init__(self, path, max_entries=20000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_accessed ON extractions(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(product_name, content_preview, model, prompt_version):
+        content_hash = hashlib.sha256(content_preview.encode("utf-8")).hexdigest()
+        raw = "\x00".join([product_name, content_hash, model, str(prompt_version)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (found, result); result may be None for posts that had no usable information"""
+        return self.get_any([key])
+
+    def get_any(self, keys):
+        """Like get(), for the first of `keys` that is stored; counts one hit or miss"""
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT result FROM extractions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    break
+            else:
+                self.misses += 1
+                return False, None
+
+            self._conn.execute(
+                "UPDATE extractions SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def put(self, key, result):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, result, accessed_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM extractions WHERE key IN ("
+                "SELECT key FROM extractions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
@@ -0,0 +1,116 @@
+"""
+Text extraction from Naver blog pages with pluggable parser backends
+"""
+import html as html_lib
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+# Post body containers, in order of preference (SmartEditor 3, legacy editor, old mobile layout)
+CONTENT_CONTAINERS = [
+    ('se-main-container', None),
+    (None, 'postViewArea'),
+    ('post_ct', None),
+]
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def strip_tags(text):
+    """Cheap tag stripping for short snippets such as Naver search titles/descriptions"""
+    return html_lib.unescape(_TAG_RE.sub('', text)).strip()
+
+
+def _clean(text):
+    text = _SPACE_RE.sub(' ', text)
+    return text.replace('\u200b', '')
+
+
+def _extract_selectolax(html):
+    tree = HTMLParser(html)
+    for css_class, element_id in CONTENT_CONTAINERS:
+        selector = f'div.{css_class}' if css_class else f'div#{element_id}'
+        node = tree.css_first(selector)
+        if node is not None:
+            text = node.text(separator='\n', strip=True)
+            if text:
+                return text
+    tree.strip_tags(['script', 'style', 'noscript'])
+    body = tree.body or tree.root
+    return body.text(separator='\n', strip=True) if body is not None else ''
+
+
+def _extract_lxml(html):
+    tree = lxml.html.fromstring(html)
+    for css_class, element_id in CONTENT_CONTAINERS:
+        if css_class:
+            xpath = f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+        else:
+            xpath = f"//div[@id='{element_id}']"
+        nodes = tree.xpath(xpath)
+        if nodes:
+            text = '\n'.join(t.strip() for t in nodes[0].itertext() if t.strip())
+            if text:
+                return text
+    for node in tree.xpath('//script|//style|//noscript'):
+        node.drop_tree()
+    return '\n'.join(t.strip() for t in tree.itertext() if t.strip())
+
+
+def _extract_bs4(html):
+    # parse_only builds a tree for the post container alone, not the whole page
+    for css_class, element_id in CONTENT_CONTAINERS:
+        if css_class:
+            strainer = SoupStrainer('div', attrs={'class': css_class})
+        else:
+            strainer = SoupStrainer('div', attrs={'id': element_id})
+        soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+        text = soup.get_text(separator='\n', strip=True)
+        if text:
+            return text
+    return BeautifulSoup(html, 'html.parser').get_text(separator='\n', strip=True)
+
+
+BACKENDS = {
+    'selectolax': _extract_selectolax,
+    'lxml': _extract_lxml,
+    'bs4': _extract_bs4,
+}
+
+
+def available_backends():
+    """Backends usable in this environment, fastest first"""
+    names = []
+    if HTMLParser is not None:
+        names.append('selectolax')
+    if lxml is not None:
+        names.append('lxml')
+    names.append('bs4')
+    return names
+
+
+def get_backend(name='auto'):
+    if name == 'auto':
+        name = available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"HTML parser backend '{name}' is not available")
+    return BACKENDS[name]
+
+
+def extract_post_text(html, backend='auto'):
+    """Extract the post body text from a mobile blog page, whitespace-collapsed"""
+    return _clean(get_backend(backend)(html))
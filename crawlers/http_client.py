@@ -0,0 +1,84 @@
+"""
+Pooled HTTP sessions with retries and request timing
+"""
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import settings
+from utils.tracing import tracer
+
+
+def create_session(pool_size=None, max_retries=None, backoff_factor=None, headers=None):
+    """Create a keep-alive session that retries 429/5xx with exponential backoff"""
+    pool_size = pool_size or settings.HTTP_POOL_SIZE
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES if max_retries is None else max_retries,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class RequestMetrics:
+    """Thread-safe per-request timing log with per-host aggregates"""
+
+    def __init__(self, max_records=500):
+        self.records = deque(maxlen=max_records)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def record(self, url, elapsed, status=None, size=0, error=None):
+        host = urlparse(url).netloc
+        with self._lock:
+            self.records.append({
+                'host': host,
+                'url': url,
+                'elapsed': elapsed,
+                'status': status,
+                'bytes': size,
+                'error': error
+            })
+            stats = self._hosts.setdefault(host, {'requests': 0, 'errors': 0, 'total_time': 0.0, 'max_time': 0.0, 'bytes': 0})
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            stats['bytes'] += size
+            if error or (status and status >= 400):
+                stats['errors'] += 1
+
+    def summary(self):
+        """Per-host request count, error count, mean/max latency and bytes"""
+        with self._lock:
+            return {
+                host: dict(stats, mean_time=stats['total_time'] / stats['requests'])
+                for host, stats in self._hosts.items()
+            }
+
+
+def timed_get(session, url, metrics, span_name='http.get', **kwargs):
+    """session.get with the configured (connect, read) timeout, recorded in metrics and as a span"""
+    kwargs.setdefault('timeout', (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT))
+    with tracer.span(span_name, host=urlparse(url).netloc) as span:
+        start = time.perf_counter()
+        try:
+            response = session.get(url, **kwargs)
+        except Exception as e:
+            metrics.record(url, time.perf_counter() - start, error=str(e))
+            raise
+        metrics.record(url, time.perf_counter() - start, response.status_code, len(response.content))
+        span.set(status=response.status_code, bytes=len(response.content))
+        return response
@@ -1,27 +1,92 @@
 """
 Naver blog crawler for product reviews
 """
-import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
-import re
-import time
+import json
+import threading
 from config import settings
+from utils.clients import get_openai_client
+from utils.tracing import tracer
+from .http_client import create_session, timed_get, RequestMetrics
+from .page_cache import PageCache
+from .html_extract import extract_post_text, strip_tags
+from .extraction_cache import ExtractionCache
+from .passage_rank import select_passages
+
+# Bump whenever the single-post / batch extraction prompt or its parsing changes,
+# to invalidate the results cached from that prompt
+EXTRACTION_PROMPT_VERSION = 1
+BATCH_EXTRACTION_PROMPT_VERSION = 1
 
 
 class ProConsLaptopCrawler:
-    def __init__(self):
+    def __init__(self, pool_size=None):
         self.naver_headers = {
             "X-Naver-Client-Id": settings.NAVER_CLIENT_ID,
             "X-Naver-Client-Secret": settings.NAVER_CLIENT_SECRET
         }
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._openai_client = None
+        
+        # One keep-alive pool per upstream host
+        self.search_session = create_session(pool_size, headers=self.naver_headers)
+        self.blog_session = create_session(pool_size, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        self.metrics = RequestMetrics()
+        self.page_cache = PageCache(
+            settings.PAGE_CACHE_PATH,
+            ttl=settings.PAGE_CACHE_TTL,
+            max_entries=settings.PAGE_CACHE_MAX_ENTRIES
+        )
+        self.extraction_cache = ExtractionCache(
+            settings.EXTRACTION_CACHE_PATH,
+            max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES
+        )
+        self.token_usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'requests': 0}
+        self._usage_lock = threading.Lock()
+    
+    @property
+    def openai_client(self):
+        """OpenAI client; the shared process-wide one unless another was set"""
+        if self._openai_client is None:
+            self._openai_client = get_openai_client()
+        return self._openai_client
+    
+    @openai_client.setter
+    def openai_client(self, client):
+        self._openai_client = client
+    
+    def get_request_stats(self):
+        """Per-host request timing summary"""
+        return self.metrics.summary()
+    
+    def _record_usage(self, response):
+        usage = getattr(response, 'usage', None)
+        if usage:
+            tracer.add('prompt_tokens', usage.prompt_tokens or 0)
+            tracer.add('completion_tokens', usage.completion_tokens or 0)
+        with self._usage_lock:
+            self.token_usage['requests'] += 1
+            if usage:
+                self.token_usage['prompt_tokens'] += usage.prompt_tokens or 0
+                self.token_usage['completion_tokens'] += usage.completion_tokens or 0
+    
+    def get_token_usage(self):
+        """Chat completion token totals since the crawler was created"""
+        with self._usage_lock:
+            usage = dict(self.token_usage)
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        return usage
+    
+    def get_cache_stats(self):
+        """Hit/miss counters for the page and extraction caches"""
+        return {
+            'pages': self.page_cache.stats(),
+            'extractions': self.extraction_cache.stats()
+        }
     
     def remove_html_tags(self, text):
         """Remove HTML tags from text"""
-        text = BeautifulSoup(text, "html.parser").get_text()
-        text = re.sub(r'<[^>]+>', '', text)
-        return text.strip()
+        return strip_tags(text)
     
     def search_blog(self, query, display=10):
         """Search Naver blogs"""
@@ -33,7 +98,7 @@ class ProConsLaptopCrawler:
         }
         
         try:
-            response = requests.get(url, headers=self.naver_headers, params=params)
+            response = timed_get(self.search_session, url, self.metrics, span_name='naver.search', params=params)
             if response.status_code == 200:
                 result = response.json()
                 for item in result.get('items', []):
@@ -45,6 +110,11 @@ class ProConsLaptopCrawler:
             return None
         return None
     
+    def _extract_text(self, html):
+        """Extract the post body text from a mobile blog page"""
+        return extract_post_text(html, backend=settings.HTML_PARSER_BACKEND)
+    
+    @tracer.traced('crawler.crawl_content')
     def crawl_content(self, url):
         """Crawl blog content"""
         try:
@@ -55,37 +125,92 @@ class ProConsLaptopCrawler:
                     post_no = parts[4].split('?')[0]
                     mobile_url = f"https://m.blog.naver.com/{blog_id}/{post_no}"
                     
-                    response = requests.get(mobile_url, headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
+                    cache_key = self.page_cache.make_key(blog_id, post_no)
+                    cached = self.page_cache.get(cache_key)
+                    tracer.annotate(cache_hit=bool(cached and cached['fresh']))
+                    if cached and cached['fresh']:
+                        content = cached['content']
+                        return content if len(content) > 300 else None
+                    
+                    # Revalidate stale entries instead of re-downloading them
+                    headers = {}
+                    if cached:
+                        if cached['etag']:
+                            headers['If-None-Match'] = cached['etag']
+                        if cached['last_modified']:
+                            headers['If-Modified-Since'] = cached['last_modified']
+                    
+                    response = timed_get(self.blog_session, mobile_url, self.metrics, span_name='naver.blog_page', headers=headers)
+                    
+                    if response.status_code == 304 and cached:
+                        tracer.annotate(revalidated=True)
+                        self.page_cache.touch(cache_key)
+                        content = cached['content']
+                        return content if len(content) > 300 else None
                     
                     if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        content = ""
-                        for selector in ['div.se-main-container', 'div#postViewArea', 'div.post_ct']:
-                            elem = soup.select_one(selector)
-                            if elem:
-                                content = elem.get_text(separator='\n', strip=True)
-                                break
-                        
-                        if not content:
-                            content = soup.get_text(separator='\n', strip=True)
-                        
-                        content = re.sub(r'\s+', ' ', content)
-                        content = content.replace('\u200b', '')
-                        
+                        content = self._extract_text(response.content)
+                        self.page_cache.put(
+                            cache_key,
+                            content,
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified')
+                        )
                         return content if len(content) > 300 else None
         except Exception as e:
             print(f"Content crawl error: {e}")
         return None
     
+    @staticmethod
+    def content_preview(product_name, content):
+        """The review-like passages of a post that fit the extraction budget"""
+        return select_passages(content, product_name, settings.EXTRACTION_CONTENT_BUDGET)
+    
+    def _extraction_cache_key(self, product_name, content_preview, batch=False):
+        version = f"batch-{BATCH_EXTRACTION_PROMPT_VERSION}" if batch else EXTRACTION_PROMPT_VERSION
+        return self.extraction_cache.make_key(product_name, content_preview, settings.EXTRACTION_MODEL, version)
+    
+    @staticmethod
+    def _parse_pros_cons(result):
+        """Parse the "장점:/단점:" bullet format into {'pros','cons'}, or None"""
+        if not result or "정보 부족" in result:
+            return None
+        
+        pros = []
+        cons = []
+        current_section = None
+        
+        for line in result.split('\n'):
+            line = line.strip()
+            if '장점:' in line:
+                current_section = 'pros'
+            elif '단점:' in line:
+                current_section = 'cons'
+            elif line.startswith('-') and current_section:
+                point = line[1:].strip()
+                if point and len(point) > 5:
+                    if current_section == 'pros':
+                        pros.append(point)
+                    else:
+                        cons.append(point)
+        
+        if pros or cons:
+            return {'pros': pros[:5], 'cons': cons[:5]}
+        return None
+    
+    @tracer.traced('openai.chat')
     def extract_pros_cons_with_gpt(self, product_name, content):
         """Extract pros and cons using GPT"""
         if not content or len(content) < 200:
             return None
         
-        content_preview = content[:1500]
+        content_preview = self.content_preview(product_name, content)
+        
+        cache_key = self._extraction_cache_key(product_name, content_preview)
+        found, cached = self.extraction_cache.get(cache_key)
+        tracer.annotate(cache_hit=found)
+        if found:
+            return cached
         
         prompt = f"""다음은 "{product_name}"에 대한 블로그 리뷰입니다.
 
@@ -104,7 +229,7 @@ class ProConsLaptopCrawler:
         
         try:
             response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=settings.EXTRACTION_MODEL,
                 messages=[
                     {"role": "system", "content": "노트북 리뷰 분석 전문가입니다."},
                     {"role": "user", "content": prompt}
@@ -112,34 +237,143 @@ class ProConsLaptopCrawler:
                 temperature=0.3,
                 max_tokens=500
             )
+            self._record_usage(response)
             
             result = response.choices[0].message.content.strip()
-            
-            if result and "정보 부족" not in result:
-                pros = []
-                cons = []
-                
-                lines = result.split('\n')
-                current_section = None
-                
-                for line in lines:
-                    line = line.strip()
-                    if '장점:' in line:
-                        current_section = 'pros'
-                    elif '단점:' in line:
-                        current_section = 'cons'
-                    elif line.startswith('-') and current_section:
-                        point = line[1:].strip()
-                        if point and len(point) > 5:
-                            if current_section == 'pros':
-                                pros.append(point)
-                            else:
-                                cons.append(point)
-                
-                if pros or cons:
-                    return {'pros': pros[:5], 'cons': cons[:5]}
-            
-            return None
+            pros_cons = self._parse_pros_cons(result)
+            self.extraction_cache.put(cache_key, pros_cons)
+            return pros_cons
         except Exception as e:
             print(f"GPT extraction error: {e}")
             return None
+    
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough token estimate; Hangul is close to one token per character"""
+        return len(text)
+    
+    def _plan_batches(self, previews, token_budget):
+        """Greedily pack (index, preview) pairs into batches that fit the token budget"""
+        batches = []
+        current = []
+        used = 0
+        for index, preview in previews:
+            cost = self.estimate_tokens(preview)
+            if current and used + cost > token_budget:
+                batches.append(current)
+                current = []
+                used = 0
+            current.append((index, preview))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    @tracer.traced('openai.chat_batch')
+    def _extract_batch_request(self, product_name, batch):
+        """One chat completion for a batch; returns {index: {'pros','cons'}} or None on a bad response"""
+        reviews = "\n\n".join(f"[리뷰 {index}]\n{preview}" for index, preview in batch)
+        prompt = f"""다음은 "{product_name}"에 대한 블로그 리뷰 {len(batch)}개입니다. 각 리뷰는 [리뷰 번호]로 구분됩니다.
+
+{reviews}
+
+각 리뷰에서 {product_name}의 구체적인 장점과 단점을 추출해 아래 JSON 형식으로만 답하세요.
+source에는 리뷰 번호를 넣고, 정보가 부족한 리뷰는 pros와 cons를 빈 배열로 두세요.
+{{"results": [{{"source": 0, "pros": ["구체적인 장점"], "cons": ["구체적인 단점"]}}]}}"""
+        
+        response = self.openai_client.chat.completions.create(
+            model=settings.EXTRACTION_MODEL,
+            messages=[
+                {"role": "system", "content": "노트북 리뷰 분석 전문가입니다. 반드시 JSON으로만 답하세요."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=min(300 * len(batch), 3000),
+            response_format={"type": "json_object"}
+        )
+        self._record_usage(response)
+        
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            return None
+        
+        try:
+            payload = json.loads(choice.message.content)
+        except (TypeError, ValueError):
+            return None
+        
+        indexes = {index for index, _ in batch}
+        parsed = {}
+        for item in payload.get('results', []):
+            try:
+                index = int(item.get('source'))
+            except (TypeError, ValueError):
+                continue
+            if index not in indexes:
+                continue
+            pros = [p.strip() for p in item.get('pros', []) if isinstance(p, str) and len(p.strip()) > 5]
+            cons = [c.strip() for c in item.get('cons', []) if isinstance(c, str) and len(c.strip()) > 5]
+            parsed[index] = {'pros': pros[:5], 'cons': cons[:5]} if pros or cons else None
+        
+        for index, preview in batch:
+            if index in parsed:
+                self.extraction_cache.put(self._extraction_cache_key(product_name, preview, batch=True), parsed[index])
+        return parsed
+    
+    def _extract_batch(self, product_name, batch, contents):
+        """
+        Extract a batch, halving it when the response is truncated or malformed; posts
+        the response leaves out are extracted one by one.
+        """
+        if len(batch) == 1:
+            index, _ = batch[0]
+            return {index: self.extract_pros_cons_with_gpt(product_name, contents[index])}
+        
+        try:
+            parsed = self._extract_batch_request(product_name, batch)
+        except Exception as e:
+            print(f"GPT batch extraction error: {e}")
+            parsed = None
+        
+        if parsed is None:
+            middle = len(batch) // 2
+            parsed = self._extract_batch(product_name, batch[:middle], contents)
+            parsed.update(self._extract_batch(product_name, batch[middle:], contents))
+            return parsed
+        
+        for index, _ in batch:
+            if index not in parsed:
+                parsed[index] = self.extract_pros_cons_with_gpt(product_name, contents[index])
+        return parsed
+    
+    def extract_pros_cons_batch(self, product_name, contents, token_budget=None):
+        """
+        Extract pros and cons from several posts with as few chat completions as possible.
+        
+        Returns a list aligned with `contents`, each entry {'pros', 'cons'} or None.
+        """
+        token_budget = token_budget or settings.GPT_BATCH_TOKEN_BUDGET
+        previews = [
+            (index, self.content_preview(product_name, content))
+            for index, content in enumerate(contents)
+            if content and len(content) >= 200
+        ]
+        
+        results = [None] * len(contents)
+        
+        # Only posts without a cached result (from either prompt) are sent to the model
+        uncached = []
+        for index, preview in previews:
+            found, cached = self.extraction_cache.get_any([
+                self._extraction_cache_key(product_name, preview, batch=True),
+                self._extraction_cache_key(product_name, preview)
+            ])
+            if found:
+                results[index] = cached
+            else:
+                uncached.append((index, preview))
+        
+        for batch in self._plan_batches(uncached, token_budget):
+            for index, pros_cons in self._extract_batch(product_name, batch, contents).items():
+                results[index] = pros_cons
+        return results
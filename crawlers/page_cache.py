@@ -0,0 +1,97 @@
+"""
+Disk-backed cache of extracted blog post text
+"""
+import os
+import sqlite3
+import threading
+import time
+
+
+class PageCache:
+    """SQLite cache of extracted page text keyed by canonical (blog_id, post_no)"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(blog_id, post_no):
+        return f"{blog_id.lower()}/{post_no}"
+
+    def get(self, key):
+        """
+        Return {'content', 'etag', 'last_modified', 'fresh'} or None.
+
+        Stale entries are still returned so the caller can revalidate them.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, etag, last_modified, fetched_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        content, etag, last_modified, fetched_at = row
+        fresh = now - fetched_at < self.ttl
+        if fresh:
+            self.hits += 1
+        return {'content': content, 'etag': etag, 'last_modified': last_modified, 'fresh': fresh}
+
+    def touch(self, key):
+        """Mark a stale entry fresh again after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+    def put(self, key, content, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, content, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content, etag, last_modified, now, now)
+            )
+            # Evict least recently accessed entries beyond the size bound
+            self._conn.execute(
+                "DELETE FROM pages WHERE key IN ("
+                "SELECT key FROM pages ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'entries': entries
+        }
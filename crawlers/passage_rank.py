@@ -0,0 +1,125 @@
+"""
+Local passage ranking: pick the parts of a blog post worth sending to the model
+"""
+import math
+import re
+from utils.normalize import normalize_product_name
+
+# Review vocabulary and its weight; substrings, so "아쉽" also matches "아쉽다"/"아쉽네요"
+REVIEW_TERMS = {
+    "장점": 3.0, "단점": 3.0, "아쉬운": 2.5, "아쉽": 2.5, "불편": 2.0, "만족": 2.0,
+    "좋았": 1.5, "좋은": 1.0, "추천": 1.0, "실사용": 1.5, "사용해보니": 1.5, "후기": 0.5,
+    "배터리": 1.5, "발열": 1.5, "팬소음": 1.5, "소음": 1.2, "무게": 1.2, "휴대성": 1.2,
+    "화면": 1.2, "디스플레이": 1.2, "밝기": 1.0, "키보드": 1.2, "터치패드": 1.2, "스피커": 1.0,
+    "성능": 1.2, "속도": 1.0, "포트": 1.0, "충전": 1.0, "가격": 1.0, "가성비": 1.2, "디자인": 1.0,
+}
+# Purchase links, sponsorship notices and blog chrome
+BOILERPLATE_TERMS = {
+    "구매링크": 2.0, "최저가": 1.5, "쿠팡": 2.0, "파트너스": 3.0, "수수료": 2.0, "제공받아": 1.5,
+    "언박싱": 1.0, "택배": 1.0, "이웃추가": 2.0, "구독": 1.0, "공감": 0.5, "댓글": 0.5,
+}
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+_WORD_RE = re.compile(r"[0-9a-zA-Z가-힣]{2,}")
+
+
+def split_passages(text, max_chars=300):
+    """Group consecutive sentences into passages of at most ~max_chars characters"""
+    passages = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+        while len(current) > max_chars:
+            passages.append(current[:max_chars])
+            current = current[max_chars:]
+    if current:
+        passages.append(current)
+    return passages
+
+
+def score_passages(passages, product_name="", k1=1.2, b=0.75):
+    """
+    BM25 over the post's own passages with weighted review terms as the query,
+    plus the product name's words, minus a boilerplate penalty.
+    """
+    terms = dict(REVIEW_TERMS)
+    for word in _WORD_RE.findall(product_name.lower()):
+        terms.setdefault(word, 1.0)
+
+    lowered = [p.lower() for p in passages]
+    counts = [{term: text.count(term) for term in terms} for text in lowered]
+    average_length = sum(len(p) for p in passages) / max(len(passages), 1)
+    n = len(passages)
+    idf = {
+        term: math.log((n - containing + 0.5) / (containing + 0.5) + 1)
+        for term in terms
+        for containing in [sum(1 for tf in counts if tf[term])]
+    }
+
+    scores = []
+    for text, tf in zip(lowered, counts):
+        score = 0.0
+        norm = k1 * (1 - b + b * len(text) / max(average_length, 1))
+        for term, weight in terms.items():
+            if tf[term]:
+                score += weight * idf[term] * tf[term] * (k1 + 1) / (tf[term] + norm)
+        score -= sum(weight for term, weight in BOILERPLATE_TERMS.items() if term in text)
+        scores.append(score)
+    return scores
+
+
+def select_passages(text, product_name="", budget=1500, max_chars=300):
+    """
+    The highest-scoring passages that fit in `budget` characters, in their original order.
+
+    Text already within the budget is returned unchanged; if no passage looks like
+    review content, the start of the text is used as before.
+    """
+    if len(text) <= budget:
+        return text
+
+    passages = split_passages(text, max_chars)
+    scores = score_passages(passages, product_name)
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    chosen = []
+    used = 0
+    for i in ranked:
+        if scores[i] <= 0:
+            break
+        cost = len(passages[i]) + 1
+        if used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return text[:budget]
+    return "\n".join(passages[i] for i in sorted(chosen))
+
+
+def _name_words(product_name):
+    """Normalized words of a product name, without makers its product line already implies"""
+    whole = normalize_product_name(product_name)
+    words = (normalize_product_name(word) for word in product_name.split())
+    return [word for word in dict.fromkeys(words) if len(word) >= 2 and word in whole]
+
+
+def snippet_relevance(text, product_name=""):
+    """
+    Cheap relevance of a search result's title + description, roughly 0..2: the share of
+    the product name's words it mentions plus its review vocabulary (capped at 1).
+    Names are compared in normalized form, so "Galaxy Book4 Pro" matches "갤럭시북4 프로".
+    """
+    words = _name_words(product_name)
+    normalized = normalize_product_name(text)
+    name_share = sum(1 for word in words if word in normalized) / len(words) if words else 0.0
+    text = text.lower()
+    review = sum(weight for term, weight in REVIEW_TERMS.items() if term in text)
+    boilerplate = sum(weight for term, weight in BOILERPLATE_TERMS.items() if term in text)
+    return name_share + min(max(review - boilerplate, 0.0) / 3, 1.0)
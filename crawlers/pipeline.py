@@ -0,0 +1,238 @@
+"""
+Concurrent search -> fetch -> extract pipeline for blog reviews
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from config import settings
+from utils.tracing import tracer
+from .rate_limit import HostThrottle
+
+NAVER_SEARCH_HOST = "openapi.naver.com"
+OPENAI_HOST = "api.openai.com"
+
+
+class CrawlPipeline:
+    """Runs Naver searches, post fetches and GPT extractions on a bounded thread pool"""
+
+    def __init__(self, crawler, max_workers=None, throttle=None, batch_mode=None, batch_max_posts=None):
+        self.crawler = crawler
+        self.max_workers = max_workers or settings.CRAWL_MAX_WORKERS
+        self.throttle = throttle or HostThrottle(
+            concurrency=settings.CRAWL_PER_HOST_CONCURRENCY,
+            rate=settings.CRAWL_REQUESTS_PER_SECOND
+        )
+        self.batch_mode = settings.GPT_BATCH_MODE if batch_mode is None else batch_mode
+        self.batch_max_posts = batch_max_posts or settings.GPT_BATCH_MAX_POSTS
+
+    def _search(self, query, display):
+        with self.throttle.limit(NAVER_SEARCH_HOST):
+            return self.crawler.search_blog(query, display=display)
+
+    def _fetch(self, post):
+        host = urlparse(post['link']).netloc
+        with self.throttle.limit(host):
+            return self.crawler.crawl_content(post['link'])
+
+    def _extract(self, product_name, contents, budget=None):
+        with self.throttle.limit(OPENAI_HOST):
+            if len(contents) == 1:
+                results = [self.crawler.extract_pros_cons_with_gpt(product_name, contents[0])]
+            else:
+                results = self.crawler.extract_pros_cons_batch(product_name, contents)
+        if budget:
+            budget.embed_points(results)
+        return results
+
+    def run(self, product_name, queries, display=5, posts_per_query=3, on_result=None, budget=None, extra_queries=()):
+        """
+        Crawl all queries concurrently.
+
+        Returns {'results': [(post, pros_cons), ...], 'messages': [str, ...], 'stop_reason'}
+        with results in query/post order, independent of completion order. If given,
+        on_result(post, pros_cons) is called from the calling thread as soon as
+        each post has been extracted; the first fetched post is then extracted on
+        its own so the caller gets points before the rest of the batch is ready.
+
+        Without a budget, the first `posts_per_query` results of every query are
+        crawled and stop_reason is None. With a CrawlBudget, off-topic results are
+        skipped, posts that fail to fetch or extract are replaced by the next
+        candidates (then by `extra_queries`), more rounds run while the budget is
+        short of its target and posts still add new points, and extraction batches
+        are no larger than the budget still needs, so the crawl can stop as soon as
+        the target is reached. At the deadline nothing new is started, and running
+        extractions get CRAWL_DEADLINE_GRACE_SECONDS to finish.
+        stop_reason is then 'enough_points', 'deadline', 'saturated', 'max_posts'
+        or 'exhausted'.
+        """
+        messages = []
+        extracted = {}
+        seen_links = set()
+        # Fetched posts waiting for extraction: (key, post, content)
+        buffer = []
+        batch_size = self.batch_max_posts if self.batch_mode else 1
+        sent = 0
+        # Search results not fetched yet, best rank first: ((post_idx, query_idx), post)
+        candidates = []
+        wanted = 0
+        started = 0
+        extra_queries = list(extra_queries)
+        next_query_idx = len(queries)
+        stop_reason = None
+
+        def handle_extracted(batch, result):
+            nonlocal wanted
+            for (post_key, post, _), pros_cons in zip(batch, result):
+                if budget:
+                    budget.record(pros_cons)
+                    if not pros_cons:
+                        wanted += 1
+                if pros_cons:
+                    extracted[post_key] = (post, pros_cons)
+                    messages.append(
+                        f"Extracted {len(pros_cons['pros'])} pros and {len(pros_cons['cons'])} cons"
+                    )
+                    if on_result:
+                        on_result(post, pros_cons)
+
+        # Tasks run in a copy of the caller's context so their spans nest under the caller's
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        if budget:
+            budget.start()
+        try:
+            pending = {}
+            for query_idx, query in enumerate(queries):
+                messages.append(f"Searching Naver for: {query}")
+                future = executor.submit(contextvars.copy_context().run, self._search, query, display)
+                pending[future] = ('search', query_idx, None)
+
+            while pending:
+                done, _ = wait(
+                    pending, timeout=budget.remaining() if budget else None, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    kind, key, payload = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Crawl pipeline error: {e}")
+                        continue
+
+                    if kind == 'search':
+                        if key < len(queries):
+                            wanted += posts_per_query
+                        if not result or 'items' not in result:
+                            continue
+                        items = result['items'] if budget else result['items'][:posts_per_query]
+                        for post_idx, post in enumerate(items):
+                            if post['link'] in seen_links:
+                                continue
+                            seen_links.add(post['link'])
+                            if budget and not budget.is_relevant(post):
+                                messages.append(f"Skipping off-topic post: {post['title'][:50]}")
+                                continue
+                            candidates.append(((post_idx, key), post))
+                        candidates.sort(key=lambda candidate: candidate[0])
+                    elif kind == 'fetch':
+                        if result:
+                            buffer.append((key, payload, result))
+                        elif budget:
+                            wanted += 1
+                    else:
+                        handle_extracted(payload, result)
+
+                if budget:
+                    stop_reason = budget.stop_reason()
+                    if stop_reason:
+                        break
+
+                # Idle but short of the target while posts still add new points: another round
+                if budget and not pending and not buffer and budget.productive():
+                    wanted = max(wanted, started + posts_per_query)
+
+                while candidates and started < wanted and (budget is None or budget.can_fetch()):
+                    (post_idx, query_idx), post = candidates.pop(0)
+                    started += 1
+                    if budget:
+                        budget.posts_fetched += 1
+                    messages.append(f"Crawling blog post: {post['title'][:50]}...")
+                    future = executor.submit(contextvars.copy_context().run, self._fetch, post)
+                    pending[future] = ('fetch', (query_idx, post_idx), post)
+
+                # Low yield: every candidate is used up but slots are still open
+                searching = any(kind == 'search' for kind, _, _ in pending.values())
+                if budget and extra_queries and not candidates and not searching \
+                        and started < wanted and budget.can_fetch():
+                    query = extra_queries.pop(0)
+                    messages.append(f"Low yield, also searching Naver for: {query}")
+                    future = executor.submit(contextvars.copy_context().run, self._search, query, display)
+                    pending[future] = ('search', next_query_idx, None)
+                    next_query_idx += 1
+
+                # Flush full batches right away, and the remainder once nothing else can join it.
+                # With a budget, posts already being extracted count toward what it still needs.
+                upstream_busy = any(kind != 'extract' for kind, _, _ in pending.values())
+                extracting = sum(len(payload) for kind, _, payload in pending.values() if kind == 'extract')
+                while buffer:
+                    size = 1 if on_result and not sent else batch_size
+                    if budget:
+                        room = budget.posts_needed() - extracting
+                        if room <= 0:
+                            break
+                        size = min(size, room)
+                    if len(buffer) < size and upstream_busy:
+                        break
+                    batch, buffer = buffer[:size], buffer[size:]
+                    sent += len(batch)
+                    extracting += len(batch)
+                    future = executor.submit(
+                        contextvars.copy_context().run,
+                        self._extract, product_name, [content for _, _, content in batch], budget
+                    )
+                    pending[future] = ('extract', None, batch)
+
+            # Deadline: extractions already paid for get a short grace period
+            if stop_reason == 'deadline':
+                running = {future: entry for future, entry in pending.items() if entry[0] == 'extract'}
+                if running:
+                    done, _ = wait(running, timeout=settings.CRAWL_DEADLINE_GRACE_SECONDS)
+                    for future in done:
+                        try:
+                            handle_extracted(running[future][2], future.result())
+                        except Exception as e:
+                            print(f"Crawl pipeline error: {e}")
+        finally:
+            # On an early stop, queued work is cancelled and running tasks are left to finish unobserved
+            executor.shutdown(wait=stop_reason is None, cancel_futures=stop_reason is not None)
+
+        if budget:
+            if stop_reason is None:
+                if candidates:
+                    stop_reason = 'saturated' if budget.can_fetch() else 'max_posts'
+                else:
+                    stop_reason = 'max_posts' if not budget.can_fetch() else 'exhausted'
+            stats = budget.stats()
+            found = f"{stats['distinct_pros']} pros and {stats['distinct_cons']} cons from {stats['posts_fetched']} posts"
+            if stop_reason == 'enough_points':
+                messages.append(f"Stopping crawl early: {found}")
+            elif stop_reason == 'deadline':
+                messages.append(f"Crawl deadline reached after {stats['elapsed']:.1f}s: {found}")
+            elif stop_reason == 'saturated':
+                messages.append(
+                    f"Stopping crawl: recent posts added nothing new ({found}, "
+                    f"{len(candidates)} candidates left)"
+                )
+            elif stop_reason == 'max_posts':
+                messages.append(f"Crawl post limit ({budget.max_posts}) reached: {found}")
+            else:
+                messages.append(
+                    f"Crawl candidates exhausted: {found} "
+                    f"({stats['posts_skipped']} off-topic skipped, {stats['posts_wasted']} without points)"
+                )
+            tracer.annotate(crawl_stop_reason=stop_reason, **stats)
+
+        return {
+            'results': [extracted[key] for key in sorted(extracted)],
+            'messages': messages,
+            'stop_reason': stop_reason
+        }
@@ -0,0 +1,63 @@
+"""
+Rate limiting primitives for the crawl pipeline
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        """Block until `tokens` are available, then consume them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostThrottle:
+    """Per-host concurrency limit plus a per-host token bucket"""
+
+    def __init__(self, concurrency=3, rate=5.0, burst=None, overrides=None):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._semaphores = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                concurrency, rate = self.overrides.get(host, (self.concurrency, self.rate))
+                self._semaphores[host] = threading.BoundedSemaphore(concurrency)
+                self._buckets[host] = TokenBucket(rate, self.burst)
+            return self._semaphores[host], self._buckets[host]
+
+    @contextmanager
+    def limit(self, host):
+        """Hold one of the host's concurrency slots after waiting for a token"""
+        semaphore, bucket = self._get(host)
+        with semaphore:
+            bucket.acquire()
+            yield
@@ -1 +1,3 @@
 from .supabase_client import SupabaseClient
+from .vector_index import ProductVectorIndex
+from .search_planner import SearchPlanner
@@ -0,0 +1,11 @@
+-- Base review table (matches the schema documented in README.md)
+CREATE TABLE IF NOT EXISTS laptop_pros_cons (
+    id SERIAL PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('pro', 'con')),
+    content TEXT NOT NULL,
+    embedding TEXT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_name ON laptop_pros_cons(product_name);
@@ -0,0 +1,42 @@
+-- One embedding per product, compared inside Postgres with pgvector
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS product_embeddings (
+    product_name TEXT PRIMARY KEY,
+    embedding VECTOR(1536) NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_embeddings_hnsw
+    ON product_embeddings USING hnsw (embedding vector_cosine_ops);
+
+-- Top-k products by cosine similarity; only names and scores leave the database
+CREATE OR REPLACE FUNCTION match_products(
+    query_embedding VECTOR(1536),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (product_name TEXT, similarity FLOAT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT pe.product_name,
+           1 - (pe.embedding <=> query_embedding) AS similarity
+    FROM product_embeddings pe
+    WHERE 1 - (pe.embedding <=> query_embedding) >= match_threshold
+    ORDER BY pe.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+-- Migrate existing per-row embeddings (one copy per product, newest row wins).
+-- Works whether laptop_pros_cons.embedding is TEXT, JSON or VECTOR.
+INSERT INTO product_embeddings (product_name, embedding)
+SELECT DISTINCT ON (product_name)
+       product_name,
+       embedding::text::vector
+FROM laptop_pros_cons
+WHERE embedding IS NOT NULL
+ORDER BY product_name, created_at DESC
+ON CONFLICT (product_name) DO NOTHING;
+
+-- Once the application no longer reads per-row embeddings, reclaim the space:
+-- ALTER TABLE laptop_pros_cons DROP COLUMN embedding;
@@ -0,0 +1,28 @@
+-- Index-backed partial matching and a single round trip for exact + partial lookups
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Lets ILIKE '%...%' on product_name use an index instead of a sequential scan
+CREATE INDEX IF NOT EXISTS idx_product_name_trgm
+    ON laptop_pros_cons USING gin (product_name gin_trgm_ops);
+
+-- Exact match first, then partial match, in one call.
+-- tier is 'exact' or 'partial'; no rows means both tiers missed.
+CREATE OR REPLACE FUNCTION search_product_tiers(query TEXT)
+RETURNS TABLE (tier TEXT, id INT, product_name TEXT, type TEXT, content TEXT, created_at TIMESTAMP)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+        SELECT 'exact'::TEXT, l.id, l.product_name, l.type, l.content, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name = query;
+    IF FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+        SELECT 'partial'::TEXT, l.id, l.product_name, l.type, l.content, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name ILIKE '%' || query || '%';
+END;
+$$;
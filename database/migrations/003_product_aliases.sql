@@ -0,0 +1,41 @@
+-- Maps normalized query keys (utils.normalize_product_name) to stored product names
+CREATE TABLE IF NOT EXISTS product_aliases (
+    alias_key TEXT PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'product',
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Exact, then alias, then partial match in one call
+DROP FUNCTION IF EXISTS search_product_tiers(TEXT);
+
+CREATE OR REPLACE FUNCTION search_product_tiers(query TEXT, query_key TEXT DEFAULT NULL)
+RETURNS TABLE (tier TEXT, id INT, product_name TEXT, type TEXT, content TEXT, created_at TIMESTAMP)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+        SELECT 'exact'::TEXT, l.id, l.product_name, l.type, l.content, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name = query;
+    IF FOUND THEN
+        RETURN;
+    END IF;
+
+    IF query_key IS NOT NULL THEN
+        RETURN QUERY
+            SELECT 'alias'::TEXT, l.id, l.product_name, l.type, l.content, l.created_at
+            FROM product_aliases a
+            JOIN laptop_pros_cons l ON l.product_name = a.product_name
+            WHERE a.alias_key = query_key;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+        SELECT 'partial'::TEXT, l.id, l.product_name, l.type, l.content, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name ILIKE '%' || query || '%';
+END;
+$$;
@@ -0,0 +1,12 @@
+-- Make pros/cons writes idempotent on (product_name, type, content)
+
+-- Remove existing duplicates, keeping the oldest row
+DELETE FROM laptop_pros_cons a
+USING laptop_pros_cons b
+WHERE a.id > b.id
+  AND a.product_name = b.product_name
+  AND a.type = b.type
+  AND a.content = b.content;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pros_cons_product_type_content
+    ON laptop_pros_cons (product_name, type, content);
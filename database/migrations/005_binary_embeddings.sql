@@ -0,0 +1,19 @@
+-- Compact binary copy of each product embedding (embeddings/codec.py format).
+-- The pgvector column stays for match_products; clients that load vectors
+-- (the local index) read embedding_bin instead of ~30 KB of JSON text.
+ALTER TABLE product_embeddings ADD COLUMN IF NOT EXISTS embedding_bin BYTEA;
+ALTER TABLE product_embeddings ADD COLUMN IF NOT EXISTS embedding_dtype TEXT NOT NULL DEFAULT 'float32'
+    CHECK (embedding_dtype IN ('float32', 'float16', 'int8'));
+
+-- Backfill existing rows as little-endian float32 (float4send is big-endian, so reverse each value's bytes)
+UPDATE product_embeddings
+SET embedding_bin = (
+        SELECT string_agg(
+            substring(b FROM 4 FOR 1) || substring(b FROM 3 FOR 1) || substring(b FROM 2 FOR 1) || substring(b FROM 1 FOR 1),
+            ''::bytea ORDER BY ord
+        )
+        FROM unnest(embedding::real[]) WITH ORDINALITY AS t(v, ord),
+             LATERAL float4send(v) AS b
+    ),
+    embedding_dtype = 'float32'
+WHERE embedding_bin IS NULL;
@@ -0,0 +1,49 @@
+-- Per-statement embeddings for review rows (embeddings/codec.py format), used to
+-- merge near-duplicate pros/cons and rank them by how many reviews support them.
+-- Existing rows are filled by SupabaseClient().backfill_statement_embeddings().
+ALTER TABLE laptop_pros_cons ADD COLUMN IF NOT EXISTS content_embedding BYTEA;
+ALTER TABLE laptop_pros_cons ADD COLUMN IF NOT EXISTS content_embedding_dtype TEXT
+    CHECK (content_embedding_dtype IN ('float32', 'float16', 'int8'));
+
+CREATE INDEX IF NOT EXISTS idx_pros_cons_missing_embedding
+    ON laptop_pros_cons (id) WHERE content_embedding IS NULL;
+
+-- Same tiers as 003, now also returning the statement embeddings
+DROP FUNCTION IF EXISTS search_product_tiers(TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION search_product_tiers(query TEXT, query_key TEXT DEFAULT NULL)
+RETURNS TABLE (
+    tier TEXT, id INT, product_name TEXT, type TEXT, content TEXT,
+    content_embedding BYTEA, content_embedding_dtype TEXT, created_at TIMESTAMP
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+        SELECT 'exact'::TEXT, l.id, l.product_name, l.type, l.content,
+               l.content_embedding, l.content_embedding_dtype, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name = query;
+    IF FOUND THEN
+        RETURN;
+    END IF;
+
+    IF query_key IS NOT NULL THEN
+        RETURN QUERY
+            SELECT 'alias'::TEXT, l.id, l.product_name, l.type, l.content,
+                   l.content_embedding, l.content_embedding_dtype, l.created_at
+            FROM product_aliases a
+            JOIN laptop_pros_cons l ON l.product_name = a.product_name
+            WHERE a.alias_key = query_key;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+        SELECT 'partial'::TEXT, l.id, l.product_name, l.type, l.content,
+               l.content_embedding, l.content_embedding_dtype, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name ILIKE '%' || query || '%';
+END;
+$$;
@@ -0,0 +1,41 @@
+-- Number of crawled reviews behind each stored point, so results served from the
+-- database keep the "most supported first" order and the "(리뷰 N건)" labels.
+-- Rows written before this column existed count as one review each.
+ALTER TABLE laptop_pros_cons ADD COLUMN IF NOT EXISTS support INT NOT NULL DEFAULT 1;
+
+-- Same tiers as 008, now also returning the support count
+DROP FUNCTION IF EXISTS search_product_tiers(TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION search_product_tiers(query TEXT, query_key TEXT DEFAULT NULL)
+RETURNS TABLE (
+    tier TEXT, source TEXT, id INT, product_name TEXT, type TEXT, content TEXT,
+    support INT, created_at TIMESTAMP
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+        SELECT 'exact'::TEXT, NULL::TEXT, l.id, l.product_name, l.type, l.content, l.support, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name = query;
+    IF FOUND THEN
+        RETURN;
+    END IF;
+
+    IF query_key IS NOT NULL THEN
+        RETURN QUERY
+            SELECT 'alias'::TEXT, a.source, l.id, l.product_name, l.type, l.content, l.support, l.created_at
+            FROM product_aliases a
+            JOIN laptop_pros_cons l ON l.product_name = a.product_name
+            WHERE a.alias_key = query_key;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+        SELECT 'partial'::TEXT, NULL::TEXT, l.id, l.product_name, l.type, l.content, l.support, l.created_at
+        FROM laptop_pros_cons l
+        WHERE l.product_name ILIKE '%' || query || '%';
+END;
+$$;
@@ -0,0 +1,52 @@
+-- Smoke test for match_products against the local Postgres stand-in.
+-- Runs in a transaction and rolls back, so it leaves no data behind.
+BEGIN;
+
+INSERT INTO laptop_pros_cons (product_name, type, content, embedding)
+SELECT 'legacy product', 'pro', 'migrated row', (
+    SELECT '[' || string_agg(CASE WHEN i = 3 THEN '1' ELSE '0' END, ',') || ']'
+    FROM generate_series(1, 1536) AS i
+);
+
+INSERT INTO product_embeddings (product_name, embedding)
+SELECT name, ('[' || string_agg(CASE WHEN i = hot THEN '1' WHEN i = hot + 1 THEN '0.5' ELSE '0' END, ',') || ']')::vector
+FROM (VALUES ('product a', 1), ('product b', 2), ('product c', 100)) AS p(name, hot),
+     generate_series(1, 1536) AS i
+GROUP BY name;
+
+-- Re-run the migration step on the legacy row
+INSERT INTO product_embeddings (product_name, embedding)
+SELECT DISTINCT ON (product_name) product_name, embedding::text::vector
+FROM laptop_pros_cons
+WHERE embedding IS NOT NULL
+ORDER BY product_name, created_at DESC
+ON CONFLICT (product_name) DO NOTHING;
+
+DO $$
+DECLARE
+    query VECTOR(1536);
+    best TEXT;
+    hits INT;
+BEGIN
+    SELECT ('[' || string_agg(CASE WHEN i = 1 THEN '1' ELSE '0' END, ',') || ']')::vector
+    INTO query
+    FROM generate_series(1, 1536) AS i;
+
+    SELECT product_name INTO best FROM match_products(query, 0.5, 5) LIMIT 1;
+    IF best <> 'product a' THEN
+        RAISE EXCEPTION 'expected product a as best match, got %', best;
+    END IF;
+
+    SELECT count(*) INTO hits FROM match_products(query, 0.5, 5);
+    IF hits <> 1 THEN
+        RAISE EXCEPTION 'expected 1 match above threshold, got %', hits;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM product_embeddings WHERE product_name = 'legacy product') THEN
+        RAISE EXCEPTION 'legacy row was not migrated';
+    END IF;
+
+    RAISE NOTICE 'match_products: OK';
+END $$;
+
+ROLLBACK;
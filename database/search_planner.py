@@ -0,0 +1,113 @@
+"""
+Search tier planner: exact -> alias -> partial -> similar with as few round trips as possible
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.normalize import normalize_product_name
+from utils.tracing import tracer
+
+
+class SearchPlanner:
+    """
+    Resolve a product name against the database.
+
+    Exact, alias and partial matches are answered by one RPC (search_product_tiers)
+    when it is installed; otherwise exact runs first and, on a miss, the alias and
+    partial tiers run concurrently. The similarity tier (an embedding call plus a
+    vector query) only runs if none of them matched. Per-tier latency (ms) is reported.
+    """
+
+    # Tiers that run side by side after an exact miss, in order of preference
+    FALLBACK_TIERS = ('alias', 'partial')
+    # After a transient RPC failure, use per-tier queries for this long (seconds)
+    RPC_RETRY_AFTER = 30
+
+    def __init__(self, db):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=6)
+        self._rpc_available = True
+        self._rpc_retry_at = 0.0
+
+    @staticmethod
+    def _timed(latency, tier, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latency[tier] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _search_tiers_rpc(self, product_name):
+        """
+        Exact + alias + partial in one round trip; returns (tier, alias source, rows),
+        or None if the RPC could not be used.
+        """
+        try:
+            with tracer.span('supabase.search_product_tiers') as span:
+                result = self.db.client.rpc('search_product_tiers', {
+                    'query': product_name,
+                    'query_key': normalize_product_name(product_name)
+                }).execute()
+                span.set(rows=len(result.data))
+        except Exception as e:
+            if self.db.is_missing_function(e):
+                print(f"search_product_tiers RPC not installed, using per-tier queries: {e}")
+                self._rpc_available = False
+            else:
+                print(f"search_product_tiers RPC failed, using per-tier queries for {self.RPC_RETRY_AFTER}s: {e}")
+                self._rpc_retry_at = time.monotonic() + self.RPC_RETRY_AFTER
+            return None
+
+        if not result.data:
+            return None, None, []
+        tier = result.data[0]['tier']
+        source = result.data[0].get('source')
+        rows = [{k: v for k, v in row.items() if k not in ('tier', 'source')} for row in result.data]
+        return tier, source, rows
+
+    def resolve(self, product_name, threshold=0.7):
+        """
+        Returns {'tier': 'exact' | 'alias' | 'partial' | 'similar' | None,
+        'source': how an alias hit's alias was made ('product' or 'similarity', else None),
+        'data': rows or None, 'latency': {tier: ms}}.
+        """
+        latency = {}
+
+        if self._rpc_available and time.monotonic() >= self._rpc_retry_at:
+            found = self._timed(latency, 'exact+alias+partial', self._search_tiers_rpc, product_name)
+            if found is not None:
+                tier, source, rows = found
+                if rows:
+                    return {'tier': tier, 'source': source, 'data': rows, 'latency': latency}
+
+                similar = self._timed(latency, 'similar', self.db.search_similar, product_name, threshold=threshold)
+                if similar and similar.data:
+                    return {'tier': 'similar', 'source': None, 'data': similar.data, 'latency': latency}
+                return {'tier': None, 'source': None, 'data': None, 'latency': latency}
+            latency.pop('exact+alias+partial', None)
+
+        exact = self._timed(latency, 'exact', self.db.search_exact, product_name)
+        if exact.data:
+            return {'tier': 'exact', 'source': None, 'data': exact.data, 'latency': latency}
+
+        # Exact missed: run the indexed tiers side by side and take the first preferred hit
+        searches = {
+            'alias': lambda: self.db.search_alias(product_name),
+            'partial': lambda: (None, self.db.search_partial(product_name)),
+        }
+        futures = {
+            tier: self._executor.submit(contextvars.copy_context().run, self._timed, latency, tier, searches[tier])
+            for tier in self.FALLBACK_TIERS
+        }
+
+        for tier in self.FALLBACK_TIERS:
+            source, result = futures[tier].result()
+            if result and result.data:
+                # Lower-priority tiers may still be running; report what finished
+                return {'tier': tier, 'source': source, 'data': result.data, 'latency': dict(latency)}
+
+        # Only a full miss pays for the query embedding
+        similar = self._timed(latency, 'similar', self.db.search_similar, product_name, threshold=threshold)
+        if similar and similar.data:
+            return {'tier': 'similar', 'source': None, 'data': similar.data, 'latency': latency}
+        return {'tier': None, 'source': None, 'data': None, 'latency': latency}
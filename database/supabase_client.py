@@ -1,28 +1,264 @@
 """
 Supabase database client with vector search support
 """
-from supabase import create_client
 from embeddings import OpenAIEmbeddings
+from embeddings.codec import encode_embedding, decode_embedding, to_pg_bytea, from_pg_bytea
 from config import settings
+from utils.clients import get_supabase_client
+from utils.normalize import normalize_product_name
+from utils.tracing import tracer
+from .vector_index import ProductVectorIndex
 import json
+import time
 
 
 class SupabaseClient:
-    def __init__(self):
-        self.client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+    PAGE_SIZE = 1000
+    ROW_CONFLICT_KEY = 'product_name,type,content'
+    # Review row columns; skips the legacy per-row product embedding text and the
+    # statement embeddings, which statement_embeddings() fetches only when needed
+    ROW_COLUMNS = "id, product_name, type, content, support, created_at"
+
+    def __init__(self, client=None):
+        self._client = client
         self.embeddings = OpenAIEmbeddings()
+        self.index = ProductVectorIndex()
+        self._match_rpc_available = True
+    
+    @property
+    def client(self):
+        """Supabase client, connected on first use"""
+        if self._client is None:
+            self._client = get_supabase_client()
+        return self._client
     
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @tracer.traced('supabase.search_exact')
     def search_exact(self, product_name):
         """Search for exact product name match"""
-        return self.client.table('laptop_pros_cons').select("*").eq('product_name', product_name).execute()
+        result = self.client.table('laptop_pros_cons').select(self.ROW_COLUMNS).eq('product_name', product_name).execute()
+        tracer.annotate(rows=len(result.data))
+        return result
     
+    @tracer.traced('supabase.search_partial')
     def search_partial(self, product_name):
         """Search for partial product name match"""
-        return self.client.table('laptop_pros_cons').select("*").ilike('product_name', f'%{product_name}%').execute()
+        result = self.client.table('laptop_pros_cons').select(self.ROW_COLUMNS).ilike('product_name', f'%{product_name}%').execute()
+        tracer.annotate(rows=len(result.data))
+        return result
+    
+    @tracer.traced('supabase.search_alias')
+    def search_alias(self, product_name):
+        """
+        Look up the normalized name in product_aliases; returns (alias source, result
+        with the canonical product's rows), or (None, empty result) without an alias.
+        """
+        alias = (
+            self.client.table('product_aliases')
+            .select("product_name, source")
+            .eq('alias_key', normalize_product_name(product_name))
+            .limit(1)
+            .execute()
+        )
+        if not alias.data:
+            return None, alias
+        return alias.data[0].get('source'), self.search_exact(alias.data[0]['product_name'])
+    
+    @tracer.traced('supabase.upsert_alias')
+    def upsert_alias(self, query, product_name, source='product'):
+        """Map the normalized form of `query` to a stored product name"""
+        try:
+            return self.client.table('product_aliases').upsert({
+                'alias_key': normalize_product_name(query),
+                'product_name': product_name,
+                'source': source
+            }, on_conflict='alias_key').execute()
+        except Exception as e:
+            print(f"Error saving product alias: {e}")
+            return None
+    
+    def rebuild_product_aliases(self):
+        """Backfill aliases for every product that already has an embedding"""
+        count = 0
+        for product_name, _ in self._fetch_product_embeddings():
+            self.upsert_alias(product_name, product_name, source='product')
+            count += 1
+        return count
+    
+    def _fetch_product_embeddings(self):
+        """Yield (product_name, embedding) pairs from product_embeddings, page by page"""
+        binary = True
+        start = 0
+        while True:
+            query = self.client.table('product_embeddings')
+            if binary:
+                # Compact encoding: a few KB of bytea per product instead of ~30 KB of JSON text
+                try:
+                    result = (
+                        query.select("product_name, embedding_bin, embedding_dtype")
+                        .range(start, start + self.PAGE_SIZE - 1)
+                        .execute()
+                    )
+                except Exception as e:
+                    print(f"Binary embeddings unavailable, reading JSON vectors: {e}")
+                    binary = False
+                    continue
+            else:
+                result = (
+                    query.select("product_name, embedding")
+                    .range(start, start + self.PAGE_SIZE - 1)
+                    .execute()
+                )
+            
+            rows = result.data
+            if binary:
+                # Rows written before the binary column existed still only have the JSON vector
+                missing = [item['product_name'] for item in rows if not item.get('embedding_bin')]
+                if missing:
+                    rows = [item for item in rows if item.get('embedding_bin')] + (
+                        self.client.table('product_embeddings')
+                        .select("product_name, embedding")
+                        .in_('product_name', missing)
+                        .execute().data
+                    )
+            
+            for item in rows:
+                if item.get('embedding_bin'):
+                    embedding = decode_embedding(from_pg_bytea(item['embedding_bin']), item['embedding_dtype'])
+                    yield item['product_name'], embedding
+                elif item.get('embedding') is not None:
+                    embedding = json.loads(item['embedding']) if isinstance(item['embedding'], str) else item['embedding']
+                    yield item['product_name'], embedding
+            if len(result.data) < self.PAGE_SIZE:
+                break
+            start += self.PAGE_SIZE
+    
+    @staticmethod
+    def _product_embedding_row(product_name, embedding):
+        """product_embeddings row: pgvector column for the RPC plus the compact binary copy"""
+        dtype = settings.EMBEDDING_STORAGE_DTYPE
+        return {
+            'product_name': product_name,
+            'embedding': embedding,
+            'embedding_bin': to_pg_bytea(encode_embedding(embedding, dtype)),
+            'embedding_dtype': dtype
+        }
+    
+    @staticmethod
+    def _statement_embedding_fields(embedding):
+        """laptop_pros_cons columns holding the embedding of the row's content"""
+        # Always both keys: PostgREST rejects bulk payloads whose objects differ in keys
+        if not embedding:
+            return {'content_embedding': None, 'content_embedding_dtype': None}
+        dtype = settings.EMBEDDING_STORAGE_DTYPE
+        return {
+            'content_embedding': to_pg_bytea(encode_embedding(embedding, dtype)),
+            'content_embedding_dtype': dtype
+        }
+    
+    def embed_statements(self, texts):
+        """Embed review statements in as few requests as possible; None for any that failed"""
+        if not texts:
+            return []
+        return self.embeddings.get_embeddings(texts) or [None] * len(texts)
+    
+    @tracer.traced('supabase.statement_embeddings')
+    def statement_embeddings(self, rows):
+        """
+        Stored embedding of each row's content, fetched by id; None where the row has
+        none yet (no API call here, see backfill_statement_embeddings).
+        """
+        ids = [row['id'] for row in rows if row.get('id') is not None]
+        stored = {}
+        for start in range(0, len(ids), self.PAGE_SIZE):
+            result = (
+                self.client.table('laptop_pros_cons')
+                .select("id, content_embedding, content_embedding_dtype")
+                .in_('id', ids[start:start + self.PAGE_SIZE])
+                .execute()
+            )
+            for item in result.data:
+                if item.get('content_embedding'):
+                    stored[item['id']] = decode_embedding(
+                        from_pg_bytea(item['content_embedding']), item.get('content_embedding_dtype') or 'float32'
+                    )
+        tracer.annotate(rows=len(ids), missing=len(ids) - len(stored))
+        return [stored.get(row.get('id')) for row in rows]
     
+    def backfill_statement_embeddings(self):
+        """Embed and store content embeddings for rows written before they existed; returns rows updated"""
+        count = 0
+        while True:
+            result = (
+                self.client.table('laptop_pros_cons')
+                .select("product_name, type, content")
+                .is_('content_embedding', 'null')
+                .limit(self.PAGE_SIZE)
+                .execute()
+            )
+            if not result.data:
+                break
+            rows = [
+                dict(row, **self._statement_embedding_fields(embedding))
+                for row, embedding in zip(result.data, self.embed_statements([row['content'] for row in result.data]))
+                if embedding
+            ]
+            failed = self._upsert_chunked('laptop_pros_cons', rows, self.ROW_CONFLICT_KEY)
+            written = len(rows) - len(failed)
+            count += written
+            # Stop rather than re-reading the same rows forever
+            if not written or len(result.data) < self.PAGE_SIZE:
+                break
+        return count
+    
+    def _ensure_index(self):
+        """Build the local vector index once, on first use"""
+        if not self.index.is_built:
+            self.index.build(self._fetch_product_embeddings())
+    
+    @staticmethod
+    def is_missing_function(error):
+        """PostgREST reports an unknown RPC as PGRST202 / HTTP 404"""
+        code = str(getattr(error, 'code', '') or '')
+        return code in ('PGRST202', '404') or 'Could not find the function' in str(error)
+    
+    @tracer.traced('supabase.match_products')
+    def match_products(self, query_embedding, threshold=0.7, match_count=5):
+        """
+        Return [(product_name, similarity)] for the closest products, best first.
+        
+        The local index is only built when the RPC is not installed (or the backend is
+        "local"); a failed call otherwise finds nothing rather than downloading every
+        product embedding while the user waits.
+        """
+        if settings.VECTOR_SEARCH_BACKEND == "rpc" and self._match_rpc_available:
+            try:
+                result = self.client.rpc('match_products', {
+                    'query_embedding': query_embedding,
+                    'match_threshold': threshold,
+                    'match_count': match_count
+                }).execute()
+                tracer.annotate(backend='rpc', rows=len(result.data))
+                return [(item['product_name'], item['similarity']) for item in result.data]
+            except Exception as e:
+                if self.is_missing_function(e):
+                    print(f"match_products RPC not installed, using local index: {e}")
+                    self._match_rpc_available = False
+                elif self.index.is_built:
+                    print(f"match_products RPC failed, using local index: {e}")
+                else:
+                    print(f"match_products RPC failed: {e}")
+                    tracer.annotate(backend='rpc', error=True)
+                    return []
+        
+        tracer.annotate(backend='local')
+        self._ensure_index()
+        return self.index.search(query_embedding, k=match_count, threshold=threshold)
+    
+    @tracer.traced('supabase.search_similar')
     def search_similar(self, product_name, threshold=0.7):
         """Search using vector similarity"""
         try:
@@ -31,34 +267,12 @@ class SupabaseClient:
             if not query_embedding:
                 return None
             
-            # Get all products with embeddings
-            result = self.client.table('laptop_pros_cons').select("*").execute()
-            
-            similar_products = []
-            checked_products = set()
-            
-            for item in result.data:
-                if item['product_name'] in checked_products:
-                    continue
-                
-                if item.get('embedding'):
-                    # Calculate similarity
-                    embedding = json.loads(item['embedding']) if isinstance(item['embedding'], str) else item['embedding']
-                    similarity = self.embeddings.cosine_similarity(query_embedding, embedding)
-                    
-                    if similarity >= threshold:
-                        similar_products.append({
-                            'product_name': item['product_name'],
-                            'similarity': similarity
-                        })
-                        checked_products.add(item['product_name'])
-            
-            # Sort by similarity
-            similar_products.sort(key=lambda x: x['similarity'], reverse=True)
-            
             # Get top match
-            if similar_products:
-                best_match = similar_products[0]['product_name']
+            matches = self.match_products(query_embedding, threshold=threshold, match_count=1)
+            if matches:
+                best_match = matches[0][0]
+                # Next time this spelling resolves with a single indexed lookup
+                self.upsert_alias(product_name, best_match, source='similarity')
                 return self.search_exact(best_match)
             
             return None
@@ -67,33 +281,195 @@ class SupabaseClient:
             print(f"Error in similarity search: {e}")
             return None
     
-    def insert_pros_cons_with_embedding(self, product_name, pros, cons):
-        """Insert pros and cons with product embedding"""
+    def upsert_product_embedding(self, product_name, embedding):
+        """Store the single embedding for a product"""
+        result = self.client.table('product_embeddings').upsert(
+            self._product_embedding_row(product_name, embedding), on_conflict='product_name'
+        ).execute()
+        
+        # Keep the local index in sync without a rebuild
+        if self.index.is_built:
+            self.index.add(product_name, embedding)
+        
+        return result
+    
+    @staticmethod
+    def _support_counts(points, counts):
+        """Support per point, 1 where the caller did not say"""
+        counts = list(counts or [])
+        return [counts[i] if i < len(counts) and counts[i] else 1 for i in range(len(points))]
+    
+    @tracer.traced('supabase.insert_pros_cons')
+    def insert_pros_cons_with_embedding(self, product_name, pros, cons, support=None):
+        """
+        Insert pros and cons with product embedding.
+        
+        `support` is {'pros': [...], 'cons': [...]}: how many reviews back each point.
+        """
+        support = support or {}
         try:
             # Get embedding for product name
             embedding = self.embeddings.get_embedding(product_name)
+            statement_embeddings = self.embed_statements(list(pros) + list(cons))
             
             data = []
             
-            for pro in pros:
+            for pro, count in zip(pros, self._support_counts(pros, support.get('pros'))):
                 data.append({
                     'product_name': product_name,
                     'type': 'pro',
                     'content': pro,
-                    'embedding': embedding
+                    'support': count
                 })
             
-            for con in cons:
+            for con, count in zip(cons, self._support_counts(cons, support.get('cons'))):
                 data.append({
                     'product_name': product_name,
                     'type': 'con',
                     'content': con,
-                    'embedding': embedding
+                    'support': count
                 })
             
+            for row, statement_embedding in zip(data, statement_embeddings):
+                row.update(self._statement_embedding_fields(statement_embedding))
+            
             if data:
-                return self.client.table('laptop_pros_cons').insert(data).execute()
+                # A point that is already stored takes the support of the latest crawl
+                result = self.client.table('laptop_pros_cons').upsert(
+                    data, on_conflict=self.ROW_CONFLICT_KEY
+                ).execute()
+                if embedding:
+                    self.upsert_product_embedding(product_name, embedding)
+                self.upsert_alias(product_name, product_name, source='product')
+                return result
                 
         except Exception as e:
             print(f"Error inserting data: {e}")
             return None
+    
+    @staticmethod
+    def _is_data_error(error):
+        """Rows rejected for their content (bad values, constraint violations, malformed payload)"""
+        code = str(getattr(error, 'code', '') or '')
+        return code[:2] in ('22', '23') or code.startswith('PGRST1')
+    
+    def _upsert_chunked(self, table, rows, on_conflict, ignore_duplicates=False, chunk_size=None):
+        """
+        Upsert rows in chunks.
+        
+        Transient errors (connection, timeout, 5xx) are retried with exponential backoff;
+        a chunk that still fails is given up whole, and after INGEST_MAX_CONSECUTIVE_FAILURES
+        such chunks in a row the remaining rows are not attempted. A chunk rejected for
+        its data is split in half until the bad rows are isolated.
+        Returns the rows that could not be written.
+        """
+        chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+        outage = {'consecutive': 0}
+        failed = []
+        for start in range(0, len(rows), chunk_size):
+            failed.extend(self._upsert_chunk(table, rows[start:start + chunk_size], on_conflict, ignore_duplicates, outage))
+        if outage['consecutive'] >= settings.INGEST_MAX_CONSECUTIVE_FAILURES:
+            print(f"Upsert into {table} stopped after {outage['consecutive']} failed chunks in a row; "
+                  f"{len(failed)} rows not written")
+        return failed
+    
+    def _upsert_chunk(self, table, chunk, on_conflict, ignore_duplicates, outage):
+        """Write one chunk; returns its unwritten rows"""
+        if outage['consecutive'] >= settings.INGEST_MAX_CONSECUTIVE_FAILURES:
+            return list(chunk)
+        
+        for attempt in range(settings.INGEST_MAX_RETRIES):
+            try:
+                with tracer.span('supabase.upsert', table=table, rows=len(chunk)):
+                    self.client.table(table).upsert(
+                        chunk, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+                    ).execute()
+                outage['consecutive'] = 0
+                return []
+            except Exception as e:
+                print(f"Upsert into {table} failed (attempt {attempt + 1}, {len(chunk)} rows): {e}")
+                if self._is_data_error(e):
+                    break
+                if attempt + 1 < settings.INGEST_MAX_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+        else:
+            outage['consecutive'] += 1
+            return list(chunk)
+        
+        # Rejected data: retrying the same rows cannot help, so isolate the bad ones
+        if len(chunk) == 1:
+            return list(chunk)
+        middle = len(chunk) // 2
+        return (
+            self._upsert_chunk(table, chunk[:middle], on_conflict, ignore_duplicates, outage)
+            + self._upsert_chunk(table, chunk[middle:], on_conflict, ignore_duplicates, outage)
+        )
+    
+    @tracer.traced('supabase.bulk_insert_pros_cons')
+    def bulk_insert_pros_cons(self, products):
+        """
+        Ingest many products' pros/cons.
+        
+        `products` is a list of {'product_name', 'pros', 'cons'} with an optional
+        'support' ({'pros': [...], 'cons': [...]}, review counts per point). Product
+        names are embedded with as few requests as the API allows, and rows are
+        upserted in chunks; rows already stored (same product_name, type, content)
+        take the new support count.
+        
+        Returns {'products', 'rows', 'failed_products'}; products listed in
+        failed_products were not fully written and can be retried safely.
+        """
+        products = [p for p in products if p['pros'] or p['cons']]
+        summary = {'products': len(products), 'rows': 0, 'failed_products': []}
+        if not products:
+            return summary
+        
+        names = list(dict.fromkeys(p['product_name'] for p in products))
+        failed_products = set()
+        
+        # One row per conflict key, or Postgres rejects the upsert
+        rows = {}
+        for product in products:
+            support = product.get('support') or {}
+            for kind, side in (('pro', 'pros'), ('con', 'cons')):
+                points = product[side]
+                for point, count in zip(points, self._support_counts(points, support.get(side))):
+                    key = (product['product_name'], kind, point)
+                    rows[key] = {'product_name': product['product_name'], 'type': kind, 'content': point, 'support': count}
+        rows = list(rows.values())
+        
+        contents = list(dict.fromkeys(row['content'] for row in rows))
+        statement_embeddings = dict(zip(contents, self.embed_statements(contents)))
+        for row in rows:
+            row.update(self._statement_embedding_fields(statement_embeddings[row['content']]))
+        
+        failed_rows = self._upsert_chunked('laptop_pros_cons', rows, self.ROW_CONFLICT_KEY)
+        failed_products.update(row['product_name'] for row in failed_rows)
+        summary['rows'] = len(rows) - len(failed_rows)
+        
+        embeddings = self.embeddings.get_embeddings(names) or [None] * len(names)
+        vectors = []
+        for name, embedding in zip(names, embeddings):
+            if embedding:
+                vectors.append(self._product_embedding_row(name, embedding))
+            else:
+                failed_products.add(name)
+        
+        failed_vectors = self._upsert_chunked('product_embeddings', vectors, 'product_name')
+        failed_products.update(row['product_name'] for row in failed_vectors)
+        if self.index.is_built:
+            unwritten = {row['product_name'] for row in failed_vectors}
+            for vector in vectors:
+                if vector['product_name'] not in unwritten:
+                    self.index.add(vector['product_name'], vector['embedding'])
+        
+        aliases = {}
+        for name in names:
+            aliases[normalize_product_name(name)] = {
+                'alias_key': normalize_product_name(name), 'product_name': name, 'source': 'product'
+            }
+        failed_aliases = self._upsert_chunked('product_aliases', list(aliases.values()), 'alias_key')
+        failed_products.update(row['product_name'] for row in failed_aliases)
+        
+        summary['failed_products'] = [name for name in names if name in failed_products]
+        return summary
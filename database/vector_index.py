@@ -0,0 +1,90 @@
+"""
+In-process vector index for product embeddings
+"""
+import threading
+import numpy as np
+from embeddings import OpenAIEmbeddings
+
+
+class ProductVectorIndex:
+    """Flat index of pre-normalized float32 product embeddings (one row per product)"""
+
+    def __init__(self, initial_capacity=1024):
+        self._initial_capacity = initial_capacity
+        self._matrix = None
+        self._names = []
+        self._positions = {}
+        self._lock = threading.RLock()
+        self.is_built = False
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, product_name):
+        return product_name in self._positions
+
+    @staticmethod
+    def _normalize(vector):
+        vector = OpenAIEmbeddings.normalize(np.ravel(vector))
+        if not vector.any():
+            return None
+        return vector
+
+    def _ensure_capacity(self, dim, needed):
+        if self._matrix is None:
+            capacity = max(self._initial_capacity, needed)
+            self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        elif needed > self._matrix.shape[0]:
+            capacity = max(needed, self._matrix.shape[0] * 2)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[:len(self._names)] = self._matrix[:len(self._names)]
+            self._matrix = grown
+
+    def build(self, items):
+        """Build the index from (product_name, embedding) pairs, keeping the first per product"""
+        with self._lock:
+            self._matrix = None
+            self._names = []
+            self._positions = {}
+            for product_name, embedding in items:
+                if product_name not in self._positions:
+                    self.add(product_name, embedding)
+            self.is_built = True
+
+    def add(self, product_name, embedding):
+        """Insert or replace the embedding for a product"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return False
+
+        with self._lock:
+            if self._matrix is not None and vector.shape[0] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vector.shape[0]} does not match index dimension {self._matrix.shape[1]}"
+                )
+
+            position = self._positions.get(product_name)
+            if position is None:
+                position = len(self._names)
+                self._ensure_capacity(vector.shape[0], position + 1)
+                self._names.append(product_name)
+                self._positions[product_name] = position
+
+            self._matrix[position] = vector
+            return True
+
+    def search(self, query_embedding, k=5, threshold=None):
+        """Return up to k (product_name, similarity) pairs, best first"""
+        query = self._normalize(query_embedding)
+        if query is None:
+            return []
+
+        with self._lock:
+            size = len(self._names)
+            if size == 0:
+                return []
+
+            matches = OpenAIEmbeddings.top_k_similar(
+                query, self._matrix[:size], k=k, threshold=threshold, normalized=True
+            )
+            return [(self._names[position], score) for position, score in matches]
@@ -1 +1,4 @@
 from .openai_embeddings import OpenAIEmbeddings
+from .cache import EmbeddingCache
+from .codec import encode_embedding, decode_embedding
+from .clustering import cluster_statements
@@ -0,0 +1,61 @@
+"""
+Near-duplicate grouping of short review statements
+"""
+import numpy as np
+from .openai_embeddings import OpenAIEmbeddings
+
+
+def cluster_statements(texts, embeddings, threshold=0.9, weights=None):
+    """
+    Group statements whose embeddings are at least `threshold` cosine-similar.
+
+    Statements are visited by descending weight; each one not yet assigned opens a
+    cluster with every unassigned statement similar to it. Identical texts are always
+    merged, and a statement without an embedding otherwise stays on its own.
+
+    Returns [{'content', 'support', 'members'}], best-supported first. 'content' is
+    the member most similar to the rest of its cluster and 'support' is the summed
+    weight (1 per statement by default).
+    """
+    merged = {}
+    for i, text in enumerate(texts):
+        weight = 1 if weights is None else weights[i]
+        if text in merged:
+            merged[text][1] += weight
+        else:
+            merged[text] = [i, weight]
+    if not merged:
+        return []
+
+    unique = list(merged)
+    first = [merged[text][0] for text in unique]
+    weight = np.array([merged[text][1] for text in unique])
+
+    dims = next((len(embeddings[i]) for i in first if embeddings[i] is not None), 0)
+    matrix = np.zeros((len(unique), dims), dtype=np.float32)
+    for row, i in enumerate(first):
+        if embeddings[i] is not None:
+            matrix[row] = embeddings[i]
+    # One matrix product gives every pairwise similarity; rows without an embedding score 0
+    scores = OpenAIEmbeddings.similarity_matrix(matrix, matrix)
+    similar = scores >= threshold
+    np.fill_diagonal(similar, True)
+
+    assigned = np.zeros(len(unique), dtype=bool)
+    clusters = []
+    for leader in np.argsort(-weight, kind='stable'):
+        if assigned[leader]:
+            continue
+        members = np.flatnonzero(similar[leader] & ~assigned)
+        assigned[members] = True
+
+        centrality = scores[np.ix_(members, members)] @ weight[members]
+        representative = members[int(np.argmax(centrality))] if len(members) > 1 else leader
+        clusters.append({
+            'content': unique[representative],
+            'support': weight[members].sum().item(),
+            'members': [unique[m] for m in members]
+        })
+
+    clusters.sort(key=lambda cluster: cluster['support'], reverse=True)
+    return clusters
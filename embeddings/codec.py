@@ -0,0 +1,55 @@
+"""
+Compact binary encoding for embedding vectors
+"""
+import numpy as np
+
+# Supported storage formats. int8 vectors carry a little-endian float32 scale prefix.
+DTYPES = ("float32", "float16", "int8")
+_INT8_HEADER = np.dtype("<f4").itemsize
+
+
+def encode_embedding(vector, dtype="float32"):
+    """Encode a vector as raw little-endian bytes in the given storage format"""
+    vector = np.asarray(vector, dtype=np.float32)
+    if dtype == "float32":
+        return vector.astype("<f4").tobytes()
+    if dtype == "float16":
+        return vector.astype("<f2").tobytes()
+    if dtype == "int8":
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return np.array([scale], dtype="<f4").tobytes() + quantized.tobytes()
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def decode_embedding(data, dtype="float32"):
+    """
+    Decode bytes from encode_embedding.
+
+    float32 and float16 return read-only views over `data` (no copy);
+    int8 is rescaled into a new float32 array.
+    """
+    if dtype == "float32":
+        return np.frombuffer(data, dtype="<f4")
+    if dtype == "float16":
+        return np.frombuffer(data, dtype="<f2")
+    if dtype == "int8":
+        scale = np.frombuffer(data, dtype="<f4", count=1)[0]
+        quantized = np.frombuffer(data, dtype=np.int8, offset=_INT8_HEADER)
+        return quantized.astype(np.float32) * scale
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def to_pg_bytea(data):
+    """Bytes -> PostgREST bytea literal"""
+    return "\\x" + data.hex()
+
+
+def from_pg_bytea(value):
+    """PostgREST bytea value ("\\x..." hex string) -> bytes"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    if value.startswith("\\x"):
+        return bytes.fromhex(value[2:])
+    raise ValueError("Unrecognized bytea value")
@@ -1,42 +1,113 @@
 """
 OpenAI Embeddings handler
 """
-from openai import OpenAI
 from typing import List, Union
 import numpy as np
 from config import settings
+from utils.clients import get_openai_client
+from utils.tracing import tracer
+from .cache import EmbeddingCache
 
 
 class OpenAIEmbeddings:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, cache: EmbeddingCache = None, client=None):
+        self._client = client
         self.model = settings.EMBEDDING_MODEL
+        self.cache = cache if cache is not None else EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            settings.EMBEDDING_CACHE_SIZE
+        )
     
+    @property
+    def client(self):
+        """OpenAI client; the shared process-wide one unless another was given"""
+        if self._client is None:
+            self._client = get_openai_client()
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @tracer.traced('openai.embeddings')
     def get_embedding(self, text: str) -> List[float]:
         """Get embedding for a single text"""
+        cached = self.cache.get(self.model, text)
+        tracer.annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.embeddings.create(
                 input=text,
                 model=self.model
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self._record_usage(response)
+            self.cache.put(self.model, text, embedding)
+            return embedding
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return None
     
+    def _chunks(self, indexes: List[int], texts: List[str]):
+        """Split request indexes so each request stays under the input-count and token limits"""
+        chunk = []
+        tokens = 0
+        for i in indexes:
+            # ~1 token per Hangul character is a safe upper bound for these inputs
+            cost = len(texts[i])
+            if chunk and (len(chunk) >= settings.EMBEDDING_BATCH_SIZE or tokens + cost > settings.EMBEDDING_BATCH_TOKENS):
+                yield chunk
+                chunk = []
+                tokens = 0
+            chunk.append(i)
+            tokens += cost
+        if chunk:
+            yield chunk
+    
+    @staticmethod
+    def _record_usage(response):
+        usage = getattr(response, 'usage', None)
+        if usage:
+            tracer.add('tokens', usage.total_tokens or 0)
+    
+    @tracer.traced('openai.embeddings_batch')
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for multiple texts"""
-        try:
-            response = self.client.embeddings.create(
-                input=texts,
-                model=self.model
-            )
-            return [data.embedding for data in response.data]
-        except Exception as e:
-            print(f"Error getting embeddings: {e}")
+        """
+        Get embeddings for multiple texts.
+        
+        Uncached texts are sent in as few requests as the API limits allow. If some
+        requests fail, their entries are None; if every request fails, returns None.
+        """
+        embeddings = [self.cache.get(self.model, text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        tracer.annotate(cache_hits=len(texts) - len(missing), cache_misses=len(missing))
+        if not missing:
+            return embeddings
+        
+        failed = 0
+        chunks = list(self._chunks(missing, texts))
+        for chunk in chunks:
+            try:
+                response = self.client.embeddings.create(
+                    input=[texts[i] for i in chunk],
+                    model=self.model
+                )
+                self._record_usage(response)
+                for i, data in zip(chunk, response.data):
+                    embeddings[i] = data.embedding
+                    self.cache.put(self.model, texts[i], data.embedding)
+            except Exception as e:
+                print(f"Error getting embeddings: {e}")
+                failed += 1
+        
+        if failed == len(chunks):
             return None
+        return embeddings
     
-    def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    @staticmethod
+    def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         vec1 = np.array(vec1)
         vec2 = np.array(vec2)
@@ -49,3 +120,57 @@ class OpenAIEmbeddings:
             return 0.0
         
         return dot_product / (norm1 * norm2)
+    
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        """Float32 copy of one vector or a matrix of row vectors scaled to unit length (zero rows stay zero)"""
+        vectors = np.array(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+    
+    @classmethod
+    def similarity_matrix(cls, queries, matrix, normalized: bool = False) -> np.ndarray:
+        """
+        Cosine similarities of each query against each row of `matrix` in one matrix product.
+        
+        Pass normalized=True when both inputs already have unit-length rows
+        (e.g. a matrix prepared once with `normalize`) to skip the norm pass.
+        """
+        if not normalized:
+            queries = cls.normalize(queries)
+            matrix = cls.normalize(matrix)
+        return np.asarray(queries, dtype=np.float32) @ np.asarray(matrix, dtype=np.float32).T
+    
+    @classmethod
+    def top_k_similar(cls, query, matrix, k: int = 5, threshold: float = None, normalized: bool = False):
+        """
+        Top-k rows of `matrix` by cosine similarity to `query`.
+        
+        Returns [(row_index, similarity)] best first. If `query` is a 2-D batch,
+        returns one such list per query.
+        """
+        scores = cls.similarity_matrix(query, matrix, normalized)
+        single = scores.ndim == 1
+        scores = np.atleast_2d(scores)
+        
+        size = scores.shape[1]
+        k = min(k, size)
+        if k <= 0:
+            return [] if single else [[] for _ in range(scores.shape[0])]
+        if k < size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(size), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        results = []
+        for rows, row_scores in zip(top, top_scores):
+            matches = [(int(i), float(score)) for i, score in zip(rows, row_scores)]
+            if threshold is not None:
+                matches = [match for match in matches if match[1] >= threshold]
+            results.append(matches)
+        return results[0] if single else results
@@ -1,2 +1,10 @@
 from .state import SearchState
-from .workflow import create_search_workflow
+from .workflow import (
+    create_search_workflow,
+    create_initial_state,
+    stream_search,
+    run_search,
+    search_key,
+    stored_product_name,
+    reviews_older_than
+)
@@ -1,55 +1,103 @@
 """
 LangGraph node functions
 """
-import time
+from collections import Counter
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
+from config import settings
+from embeddings import cluster_statements
+from utils.clients import shared
+from utils.tracing import tracer
 from .state import SearchState
-from database import SupabaseClient
-from crawlers import ProConsLaptopCrawler
+from database import SupabaseClient, SearchPlanner
+from crawlers import ProConsLaptopCrawler, CrawlPipeline, CrawlBudget
 
 
-# Initialize clients
-supabase_client = SupabaseClient()
-crawler = ProConsLaptopCrawler()
+# Clients are created on first use and shared by every node and caller
+def get_supabase_client():
+    return shared('supabase_client', SupabaseClient)
 
 
+def get_search_planner():
+    return shared('search_planner', lambda: SearchPlanner(get_supabase_client()))
+
+
+def get_crawler():
+    return shared('crawler', ProConsLaptopCrawler)
+
+
+def get_crawl_pipeline():
+    return shared('crawl_pipeline', lambda: CrawlPipeline(get_crawler()))
+
+
+_GETTERS = {
+    'supabase_client': get_supabase_client,
+    'search_planner': get_search_planner,
+    'crawler': get_crawler,
+    'crawl_pipeline': get_crawl_pipeline,
+}
+
+
+def __getattr__(name):
+    # `nodes.supabase_client` etc. still work, but only build the client when used
+    if name in _GETTERS:
+        return _GETTERS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@tracer.traced('node.search_database', kind='node')
 def search_database(state: SearchState) -> SearchState:
     """Search product in database"""
     product_name = state["product_name"]
     
+    if state.get("force_crawl"):
+        state["messages"].append(
+            HumanMessage(content=f"Refreshing reviews from the web for: {product_name}")
+        )
+        state["results"] = {"data": None}
+        return state
+    
     state["messages"].append(
         HumanMessage(content=f"Searching database for: {product_name}")
     )
     
     try:
-        # Try exact match first
-        exact_match = supabase_client.search_exact(product_name)
-        if exact_match.data:
+        resolved = get_search_planner().resolve(product_name, threshold=0.7)
+        state["tier_latency"] = resolved["latency"]
+        state["messages"].append(
+            AIMessage(content="Search tier latency: " + ", ".join(
+                f"{tier} {ms}ms" for tier, ms in resolved["latency"].items()
+            ))
+        )
+        
+        if resolved["tier"] == "exact":
             state["search_method"] = "database"
-            state["results"] = {"data": exact_match.data}
+            state["results"] = {"data": resolved["data"]}
+            state["messages"].append(
+                AIMessage(content=f"Found {len(resolved['data'])} results in database")
+            )
+            return state
+        
+        if resolved["tier"] == "alias":
+            # An alias written by search_similar is still a fuzzy match
+            state["search_method"] = "similarity" if resolved["source"] == "similarity" else "database"
+            state["results"] = {"data": resolved["data"]}
             state["messages"].append(
-                AIMessage(content=f"Found {len(exact_match.data)} results in database")
+                AIMessage(content=f"Found {len(resolved['data'])} results in database for '{resolved['data'][0]['product_name']}'")
             )
             return state
         
-        # Try partial match
-        partial_match = supabase_client.search_partial(product_name)
-        if partial_match.data:
+        if resolved["tier"] == "partial":
             state["search_method"] = "database"
-            state["results"] = {"data": partial_match.data}
+            state["results"] = {"data": resolved["data"]}
             state["messages"].append(
-                AIMessage(content=f"Found {len(partial_match.data)} partial matches in database")
+                AIMessage(content=f"Found {len(resolved['data'])} partial matches in database")
             )
             return state
         
-        # Try similarity search
-        state["messages"].append(
-            AIMessage(content="No exact match found, trying similarity search...")
-        )
-        similar_match = supabase_client.search_similar(product_name, threshold=0.7)
-        if similar_match and similar_match.data:
+        if resolved["tier"] == "similar":
             state["search_method"] = "similarity"
-            state["results"] = {"data": similar_match.data}
+            state["results"] = {"data": resolved["data"]}
             state["messages"].append(
                 AIMessage(content=f"Found similar product in database using AI similarity")
             )
@@ -69,7 +117,80 @@ def search_database(state: SearchState) -> SearchState:
         return state
 
 
-def crawl_web(state: SearchState) -> SearchState:
+def _emit(config, event):
+    """Send a progress event to the caller's event_callback, if streaming"""
+    callback = (config or {}).get("configurable", {}).get("event_callback")
+    if callback:
+        callback(event)
+
+
+def _merge_points(point_posts, embeddings):
+    """Cluster crawled statements; support is the number of distinct posts behind each point"""
+    clusters = cluster_statements(
+        list(point_posts), embeddings, threshold=settings.STATEMENT_SIMILARITY_THRESHOLD
+    )
+    for cluster in clusters:
+        cluster['support'] = len(set().union(*(point_posts[m] for m in cluster['members'])))
+    clusters.sort(key=lambda cluster: cluster['support'], reverse=True)
+    clusters = clusters[:settings.REVIEW_TOP_N]
+    return [c['content'] for c in clusters], [c['support'] for c in clusters]
+
+
+def collect_reviews(product_name, on_result=None):
+    """
+    Crawl and extract pros/cons for a product without touching the database.
+    
+    Returns {'pros', 'cons', 'support', 'sources', 'messages'}; shared by crawl_web
+    and the headless pre-warming script.
+    """
+    # Statement -> indexes of the posts that mentioned it
+    pro_posts = {}
+    con_posts = {}
+    sources = []
+    
+    # Search queries; the extra ones are only used when the first yield too little
+    search_queries = [
+        f"{product_name} 장단점 실사용",
+        f"{product_name} 후기"
+    ]
+    extra_queries = [
+        f"{product_name} 단점",
+        f"{product_name} 장점"
+    ]
+    
+    # Searches, page fetches and GPT extractions run concurrently until the budget is met
+    crawl = get_crawl_pipeline().run(
+        product_name, search_queries, display=settings.CRAWL_SEARCH_DISPLAY, posts_per_query=3,
+        on_result=on_result, extra_queries=extra_queries,
+        budget=CrawlBudget(product_name, embed=get_supabase_client().embed_statements)
+    )
+    
+    for i, (post, pros_cons) in enumerate(crawl['results']):
+        for point in pros_cons['pros']:
+            pro_posts.setdefault(point, set()).add(i)
+        for point in pros_cons['cons']:
+            con_posts.setdefault(point, set()).add(i)
+        sources.append({
+            'title': post['title'],
+            'link': post['link']
+        })
+    
+    # Merge near-duplicates across posts; one embedding request covers both sides
+    embeddings = get_supabase_client().embed_statements(list(pro_posts) + list(con_posts))
+    pros, pro_support = _merge_points(pro_posts, embeddings[:len(pro_posts)])
+    cons, con_support = _merge_points(con_posts, embeddings[len(pro_posts):])
+    
+    return {
+        'pros': pros,
+        'cons': cons,
+        'support': {'pros': pro_support, 'cons': con_support},
+        'sources': sources[:5],
+        'messages': crawl['messages']
+    }
+
+
+@tracer.traced('node.crawl_web', kind='node')
+def crawl_web(state: SearchState, config: RunnableConfig = None) -> SearchState:
     """Crawl web for product information"""
     if state["results"].get("data"):  # Already found in DB
         return state
@@ -81,66 +202,34 @@ def crawl_web(state: SearchState) -> SearchState:
         HumanMessage(content=f"Starting web crawl for: {product_name}")
     )
     
-    all_pros = []
-    all_cons = []
-    sources = []
+    _emit(config, {"type": "status", "content": "웹에서 리뷰를 수집하는 중..."})
     
-    # Search queries
-    search_queries = [
-        f"{product_name} 장단점 실사용",
-        f"{product_name} 후기"
-    ]
+    def on_result(post, pros_cons):
+        _emit(config, {"type": "source", "title": post['title'], "link": post['link']})
+        _emit(config, {"type": "points", "pros": pros_cons['pros'], "cons": pros_cons['cons']})
     
-    for query in search_queries[:2]:
-        state["messages"].append(
-            AIMessage(content=f"Searching Naver for: {query}")
-        )
-        
-        result = crawler.search_blog(query, display=5)
-        if not result or 'items' not in result:
-            continue
-        
-        posts = result['items']
-        
-        for idx, post in enumerate(posts[:3]):
-            state["messages"].append(
-                AIMessage(content=f"Crawling blog post: {post['title'][:50]}...")
-            )
-            
-            content = crawler.crawl_content(post['link'])
-            if not content:
-                continue
-            
-            pros_cons = crawler.extract_pros_cons_with_gpt(product_name, content)
-            
-            if pros_cons:
-                all_pros.extend(pros_cons['pros'])
-                all_cons.extend(pros_cons['cons'])
-                sources.append({
-                    'title': post['title'],
-                    'link': post['link']
-                })
-                
-                state["messages"].append(
-                    AIMessage(content=f"Extracted {len(pros_cons['pros'])} pros and {len(pros_cons['cons'])} cons")
-                )
-            
-            time.sleep(0.5)
-    
-    # Remove duplicates
-    state["pros"] = list(dict.fromkeys(all_pros))[:10]
-    state["cons"] = list(dict.fromkeys(all_cons))[:10]
-    state["sources"] = sources[:5]
+    # Only a streaming caller benefits from extracting the first post on its own
+    streaming = (config or {}).get("configurable", {}).get("event_callback") is not None
+    reviews = collect_reviews(product_name, on_result=on_result if streaming else None)
+    
+    for message in reviews['messages']:
+        state["messages"].append(AIMessage(content=message))
+    
+    state["pros"] = reviews['pros']
+    state["cons"] = reviews['cons']
+    state["support"] = reviews['support']
+    state["sources"] = reviews['sources']
     
     # Save to database with embeddings if we found data
     if state["pros"] or state["cons"]:
         state["messages"].append(
             AIMessage(content="Saving results to database with embeddings...")
         )
-        supabase_client.insert_pros_cons_with_embedding(
+        get_supabase_client().insert_pros_cons_with_embedding(
             product_name, 
             state["pros"], 
-            state["cons"]
+            state["cons"],
+            support=state["support"]
         )
     
     state["messages"].append(
@@ -150,17 +239,47 @@ def crawl_web(state: SearchState) -> SearchState:
     return state
 
 
+def summarize_points(rows):
+    """
+    Merge near-duplicate statements and keep the REVIEW_TOP_N best supported.
+    
+    Each row counts with its stored support (the reviews behind it when it was
+    crawled). Statement embeddings are only fetched when there are more distinct
+    statements than can be shown; smaller sets were already merged when they were
+    crawled. Returns (contents, support_counts), most supported first.
+    """
+    if not rows:
+        return [], []
+    texts = [row['content'] for row in rows]
+    weights = [row.get('support') or 1 for row in rows]
+    counts = Counter()
+    for text, weight in zip(texts, weights):
+        counts[text] += weight
+    if len(counts) <= settings.REVIEW_TOP_N:
+        contents = sorted(counts, key=lambda text: -counts[text])
+        return contents, [counts[text] for text in contents]
+    clusters = cluster_statements(
+        texts,
+        get_supabase_client().statement_embeddings(rows),
+        threshold=settings.STATEMENT_SIMILARITY_THRESHOLD,
+        weights=weights
+    )[:settings.REVIEW_TOP_N]
+    return [c['content'] for c in clusters], [c['support'] for c in clusters]
+
+
+@tracer.traced('node.process_results', kind='node')
 def process_results(state: SearchState) -> SearchState:
     """Process and organize results"""
     if state["search_method"] in ["database", "similarity"] and state["results"].get("data"):
         # Process DB results
         data = state["results"]["data"]
-        state["pros"] = [item['content'] for item in data if item['type'] == 'pro']
-        state["cons"] = [item['content'] for item in data if item['type'] == 'con']
+        state["pros"], pro_support = summarize_points([item for item in data if item['type'] == 'pro'])
+        state["cons"], con_support = summarize_points([item for item in data if item['type'] == 'con'])
+        state["support"] = {"pros": pro_support, "cons": con_support}
         state["sources"] = []  # No sources for DB results
         
         state["messages"].append(
-            AIMessage(content=f"Processed results: {len(state['pros'])} pros, {len(state['cons'])} cons")
+            AIMessage(content=f"Processed results: {len(state['pros'])} pros, {len(state['cons'])} cons from {len(data)} stored statements")
         )
     
     return state
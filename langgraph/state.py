@@ -9,11 +9,14 @@ import operator
 class SearchState(TypedDict):
     """State for the search process"""
     product_name: str
+    force_crawl: bool  # Skip the database and re-crawl (background refresh)
     search_method: str  # "database", "web_crawling", or "similarity"
     results: dict
     pros: List[str]
     cons: List[str]
+    support: dict  # {"pros": [...], "cons": [...]}: how many statements back each point
     sources: List[dict]
     messages: Annotated[List[Union[HumanMessage, AIMessage]], operator.add]
     error: str
     similar_products: List[dict]  # For similarity search results
+    tier_latency: dict  # Milliseconds spent per database search tier
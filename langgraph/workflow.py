@@ -1,7 +1,11 @@
 """
 LangGraph workflow definition
 """
+import queue
+import threading
+from datetime import datetime, timedelta
 from langgraph.graph import StateGraph, END
+from utils.normalize import normalize_product_name
 from .state import SearchState
 from .nodes import search_database, crawl_web, process_results, should_search_web
 
@@ -29,3 +33,107 @@ def create_search_workflow():
     workflow.add_edge("process", END)
     
     return workflow.compile()
+
+
+def create_initial_state(product_name, force_crawl=False):
+    """Initial SearchState for a product query"""
+    return {
+        "product_name": product_name,
+        "force_crawl": force_crawl,
+        "search_method": "",
+        "results": {},
+        "pros": [],
+        "cons": [],
+        "support": {"pros": [], "cons": []},
+        "sources": [],
+        "messages": [],
+        "error": "",
+        "similar_products": [],
+        "tier_latency": {}
+    }
+
+
+def search_key(product_name):
+    """Key under which concurrent searches for the same product are coalesced"""
+    return normalize_product_name(product_name)
+
+
+def stream_search(search_app, initial_state, single_flight=None):
+    """
+    Run the compiled workflow in a background thread and yield progress events.
+    
+    Yields dicts with a "type" of "status", "source" or "points" while crawl_web
+    is extracting posts, then a single {"type": "final", "state": final_state}.
+    Events are yielded on the caller's thread, so they can be rendered directly.
+    
+    With a SingleFlight, concurrent searches for the same product share one run;
+    only the leader streams progress, followers receive the shared final state.
+    """
+    events = queue.Queue()
+    outcome = {}
+    
+    def invoke():
+        return search_app.invoke(
+            initial_state,
+            config={"configurable": {"event_callback": events.put}}
+        )
+    
+    def run():
+        try:
+            if single_flight is None:
+                outcome["state"] = invoke()
+            else:
+                key = search_key(initial_state["product_name"])
+                outcome["state"], _ = single_flight.do(key, invoke)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            events.put(None)
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        yield event
+    
+    worker.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    yield {"type": "final", "state": outcome["state"]}
+
+
+def run_search(search_app, product_name, force_crawl=False, single_flight=None):
+    """Run the workflow to completion without streaming and return the final state"""
+    initial_state = create_initial_state(product_name, force_crawl=force_crawl)
+    if single_flight is None:
+        return search_app.invoke(initial_state)
+    state, _ = single_flight.do(search_key(product_name), lambda: search_app.invoke(initial_state))
+    return state
+
+
+def stored_product_name(state):
+    """The product a DB-served result came from, which alias and similarity hits may spell differently"""
+    data = (state.get("results") or {}).get("data") or []
+    if state.get("search_method") != "web_crawling" and data:
+        return data[0]["product_name"]
+    return state["product_name"]
+
+
+def reviews_older_than(state, days):
+    """True if the newest stored review behind a DB-served result is older than `days`"""
+    if state.get("search_method") == "web_crawling":
+        return False
+    
+    data = (state.get("results") or {}).get("data") or []
+    timestamps = []
+    for row in data:
+        try:
+            timestamps.append(datetime.fromisoformat(str(row["created_at"])).replace(tzinfo=None))
+        except (KeyError, ValueError):
+            continue
+    
+    if not timestamps:
+        return False
+    return datetime.now() - max(timestamps) > timedelta(days=days)
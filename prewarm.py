@@ -0,0 +1,176 @@
+"""
+Smart Shopping App - Headless catalog pre-warming crawler
+
+Crawls a product catalog ahead of time so popular products are served from the
+database instead of an inline web crawl.
+
+Usage:
+    python prewarm.py products.csv --workers 3
+    python prewarm.py products.jsonl --checkpoint .cache/prewarm.jsonl
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import settings
+from langgraph.nodes import collect_reviews, get_crawler, get_supabase_client
+
+
+def load_catalog(path):
+    """Read product names from a CSV (product_name column, or the first column) or JSONL file"""
+    names = []
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    item = json.loads(line)
+                    names.append(item['product_name'] if isinstance(item, dict) else str(item))
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+        if rows and 'product_name' in rows[0]:
+            column = rows[0].index('product_name')
+            rows = rows[1:]
+        else:
+            column = 0
+        names = [row[column] for row in rows if row and row[column].strip()]
+
+    # Keep catalog order, drop duplicates
+    return list(dict.fromkeys(name.strip() for name in names))
+
+
+def load_checkpoint(path):
+    """Product names already persisted by a previous run"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('status') in ('done', 'empty', 'exists'):
+                    done.add(entry['product_name'])
+    return done
+
+
+class Prewarmer:
+    def __init__(self, checkpoint_path, flush_size=50, skip_existing=True):
+        self.checkpoint_path = checkpoint_path
+        self.flush_size = flush_size
+        self.skip_existing = skip_existing
+        self.pending = []
+        self.lock = threading.Lock()
+
+        self.started = time.time()
+        self.start_tokens = get_crawler().get_token_usage()['total_tokens']
+        self.processed = 0
+        self.stored = 0
+        self.failed = 0
+
+        directory = os.path.dirname(checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _checkpoint(self, entries):
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(dict(entry, ts=time.time()), ensure_ascii=False) + '\n')
+
+    def _flush(self):
+        """Bulk-upsert buffered results, then checkpoint the products that were fully written"""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        summary = get_supabase_client().bulk_insert_pros_cons(batch)
+        failed = set(summary['failed_products'])
+        if failed:
+            self.failed += len(failed)
+            print(f"Insert failed for {len(failed)} products; they will be retried on the next run")
+        stored = [p for p in batch if p['product_name'] not in failed]
+        self.stored += len(stored)
+        self._checkpoint([
+            {'product_name': p['product_name'], 'status': 'done', 'pros': len(p['pros']), 'cons': len(p['cons'])}
+            for p in stored
+        ])
+
+    def crawl(self, product_name):
+        """Runs on a worker thread; returns (status, pros, cons, support)"""
+        if self.skip_existing:
+            existing = get_supabase_client().search_exact(product_name)
+            if existing.data:
+                return 'exists', [], [], None
+        reviews = collect_reviews(product_name)
+        status = 'done' if reviews['pros'] or reviews['cons'] else 'empty'
+        return status, reviews['pros'], reviews['cons'], reviews['support']
+
+    def record(self, product_name, status, pros, cons, support=None):
+        """Runs on the coordinating thread"""
+        with self.lock:
+            self.processed += 1
+            if status == 'done':
+                self.pending.append({'product_name': product_name, 'pros': pros, 'cons': cons, 'support': support})
+                if len(self.pending) >= self.flush_size:
+                    self._flush()
+            else:
+                self._checkpoint([{'product_name': product_name, 'status': status}])
+
+    def report(self, total, product_name, status, pros, cons):
+        minutes = max(time.time() - self.started, 1e-6) / 60
+        tokens = get_crawler().get_token_usage()['total_tokens'] - self.start_tokens
+        print(
+            f"[{self.processed}/{total}] {product_name}: {status} ({len(pros)} pros, {len(cons)} cons) | "
+            f"{self.processed / minutes:.1f} products/min, {tokens / minutes:.0f} tokens/min"
+        )
+
+    def finish(self):
+        with self.lock:
+            self._flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-crawl a product catalog into laptop_pros_cons")
+    parser.add_argument('catalog', help="CSV (product_name column) or JSONL file")
+    parser.add_argument('--workers', type=int, default=3, help="products crawled in parallel")
+    parser.add_argument('--checkpoint', default=os.path.join(settings.CACHE_DIR, 'prewarm_checkpoint.jsonl'))
+    parser.add_argument('--flush-size', type=int, default=50, help="products per bulk upsert")
+    parser.add_argument('--recrawl', action='store_true', help="crawl products already in the database")
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog)
+    done = load_checkpoint(args.checkpoint)
+    todo = [name for name in catalog if name not in done]
+    print(f"{len(catalog)} products in catalog, {len(catalog) - len(todo)} already done, {len(todo)} to crawl")
+
+    prewarmer = Prewarmer(args.checkpoint, flush_size=args.flush_size, skip_existing=not args.recrawl)
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {executor.submit(prewarmer.crawl, name): name for name in todo}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    status, pros, cons, support = future.result()
+                except Exception as e:
+                    print(f"{name}: crawl error: {e}")
+                    prewarmer.failed += 1
+                    continue
+                prewarmer.record(name, status, pros, cons, support)
+                prewarmer.report(len(todo), name, status, pros, cons)
+    finally:
+        prewarmer.finish()
+
+    elapsed = time.time() - prewarmer.started
+    usage = get_crawler().get_token_usage()
+    print(
+        f"Finished in {elapsed:.0f}s: {prewarmer.stored} stored, {prewarmer.failed} failed, "
+        f"{usage['total_tokens'] - prewarmer.start_tokens} tokens"
+    )
+
+
+if __name__ == '__main__':
+    main()
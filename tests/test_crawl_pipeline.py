@@ -0,0 +1,143 @@
+import threading
+import time
+import pytest
+from config import settings
+from crawlers import CrawlPipeline, CrawlBudget
+from crawlers.rate_limit import HostThrottle
+
+PRODUCT = "그램 16"
+
+
+class FakeCrawler:
+    """
+    Naver/OpenAI stand-in: every query finds `display` posts about the product, and
+    each post yields `points` pros and cons of its own unless its link is in `bad_posts`
+    (empty page) or `empty_posts` (nothing extracted).
+    """
+
+    def __init__(self, points=5, extract_seconds=0.0, bad_posts=(), empty_posts=None):
+        self.points = points
+        self.extract_seconds = extract_seconds
+        self.bad_posts = set(bad_posts)
+        self.empty_posts = empty_posts
+        self.extract_calls = []
+        self._lock = threading.Lock()
+
+    def search_blog(self, query, display=10):
+        return {'items': [
+            {'title': f"{PRODUCT} 장단점 후기 {i}", 'description': "실사용 배터리 장점 단점",
+             'link': f"https://blog.naver.com/{query}/{i}"}
+            for i in range(display)
+        ]}
+
+    def crawl_content(self, link):
+        if link in self.bad_posts:
+            return None
+        return link
+
+    def _extract_one(self, content):
+        if self.empty_posts is not None and (self.empty_posts == 'all' or content in self.empty_posts):
+            return None
+        return {
+            'pros': [f"{content} 장점 {i}" for i in range(self.points)],
+            'cons': [f"{content} 단점 {i}" for i in range(self.points)],
+        }
+
+    def extract_pros_cons_batch(self, product_name, contents):
+        with self._lock:
+            self.extract_calls.append(len(contents))
+        time.sleep(self.extract_seconds)
+        return [self._extract_one(content) for content in contents]
+
+    def extract_pros_cons_with_gpt(self, product_name, content):
+        return self.extract_pros_cons_batch(product_name, [content])[0]
+
+
+def run(crawler, budget, queries=("q0", "q1"), display=10, extra_queries=()):
+    pipeline = CrawlPipeline(
+        crawler, max_workers=8, throttle=HostThrottle(concurrency=10, rate=1000),
+        batch_mode=True, batch_max_posts=6
+    )
+    return pipeline.run(
+        PRODUCT, list(queries), display=display, posts_per_query=3, budget=budget, extra_queries=extra_queries
+    )
+
+
+def test_stops_once_enough_distinct_points_are_extracted():
+    crawler = FakeCrawler(points=5)
+    budget = CrawlBudget(PRODUCT, target_points=10, deadline=0, max_posts=12)
+
+    crawl = run(crawler, budget)
+
+    assert crawl['stop_reason'] == 'enough_points'
+    # Three points per post are assumed up front, so one batch of four posts is sent, not six
+    assert crawler.extract_calls == [4]
+    assert budget.posts_extracted == 4
+    assert len(crawl['results']) == 4
+
+
+def test_failed_posts_are_replaced_by_the_next_candidates():
+    bad = {"https://blog.naver.com/q0/0", "https://blog.naver.com/q1/1"}
+    crawler = FakeCrawler(points=2, bad_posts=bad)
+    budget = CrawlBudget(PRODUCT, target_points=12, deadline=0, max_posts=12)
+
+    crawl = run(crawler, budget)
+
+    links = [post['link'] for post, _ in crawl['results']]
+    assert crawl['stop_reason'] == 'enough_points'
+    assert len(links) == 6
+    assert not bad & set(links)
+    assert budget.posts_fetched == 8
+
+
+def test_deadline_keeps_extractions_already_running(monkeypatch):
+    monkeypatch.setattr(settings, 'CRAWL_DEADLINE_GRACE_SECONDS', 2)
+    crawler = FakeCrawler(points=1, extract_seconds=0.5)
+    budget = CrawlBudget(PRODUCT, target_points=50, deadline=0.2, max_posts=12)
+
+    start = time.monotonic()
+    crawl = run(crawler, budget)
+
+    assert crawl['stop_reason'] == 'deadline'
+    assert crawl['results']
+    assert len(crawl['results']) == budget.posts_extracted
+    assert time.monotonic() - start < 2
+
+
+def test_unproductive_posts_are_replaced_up_to_max_posts():
+    crawler = FakeCrawler(empty_posts='all')
+    budget = CrawlBudget(PRODUCT, target_points=10, deadline=0, max_posts=8)
+
+    crawl = run(crawler, budget)
+
+    assert crawl['stop_reason'] == 'max_posts'
+    assert crawl['results'] == []
+    assert budget.posts_fetched == 8
+    assert budget.posts_wasted == 8
+
+
+def test_runs_out_of_candidates_before_max_posts():
+    crawler = FakeCrawler(empty_posts='all')
+    budget = CrawlBudget(PRODUCT, target_points=10, deadline=0, max_posts=12)
+
+    crawl = run(crawler, budget, display=2, extra_queries=["q2"])
+
+    assert crawl['stop_reason'] == 'exhausted'
+    # Two results from each of the two queries, then two from the extra query
+    assert budget.posts_fetched == 6
+    assert any("also searching Naver for: q2" in message for message in crawl['messages'])
+
+
+@pytest.mark.parametrize('on_result', [None, lambda post, pros_cons: None])
+def test_without_a_budget_every_query_gets_its_posts(on_result):
+    crawler = FakeCrawler(points=2)
+    pipeline = CrawlPipeline(crawler, max_workers=8, throttle=HostThrottle(concurrency=10, rate=1000),
+                             batch_mode=True, batch_max_posts=6)
+
+    crawl = pipeline.run(PRODUCT, ["q0", "q1"], display=10, posts_per_query=3, on_result=on_result)
+
+    assert crawl['stop_reason'] is None
+    assert len(crawl['results']) == 6
+    assert sum(crawler.extract_calls) == 6
+    if on_result:
+        assert crawler.extract_calls[0] == 1
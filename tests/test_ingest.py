@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+import pytest
+from config import settings
+from database import supabase_client
+from database.supabase_client import SupabaseClient
+
+
+class APIError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class FlakyTables:
+    """Supabase stand-in whose upserts fail according to `fail(rows, call_number)`"""
+
+    def __init__(self, fail):
+        self.fail = fail
+        self.calls = 0
+        self.written = []
+        self._rows = None
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict='', ignore_duplicates=False):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        self.calls += 1
+        error = self.fail(self._rows, self.calls)
+        if error:
+            raise error
+        self.written.extend(self._rows)
+        return SimpleNamespace(data=self._rows)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    monkeypatch.setattr(settings, 'INGEST_MAX_RETRIES', 3)
+    monkeypatch.setattr(settings, 'INGEST_MAX_CONSECUTIVE_FAILURES', 3)
+    slept = []
+    monkeypatch.setattr(supabase_client.time, 'sleep', slept.append)
+    return slept
+
+
+def make_rows(count):
+    return [{'product_name': f"p{i}", 'type': 'pro', 'content': f"point {i}"} for i in range(count)]
+
+
+def test_data_errors_are_bisected_to_the_bad_rows(sleeps):
+    rows = make_rows(2000)
+    bad = {rows[10]['content'], rows[1500]['content']}
+    db = FlakyTables(lambda chunk, _: any(r['content'] in bad for r in chunk) and APIError("bad value", '22P02'))
+
+    failed = SupabaseClient(client=db)._upsert_chunked('laptop_pros_cons', rows, 'product_name', chunk_size=500)
+
+    assert {row['content'] for row in failed} == bad
+    assert len(db.written) == 1998
+    assert db.calls == 38
+    assert sleeps == []
+
+
+def test_transient_errors_are_retried(sleeps):
+    rows = make_rows(1000)
+    db = FlakyTables(lambda chunk, call: call == 1 and APIError("Server disconnected"))
+
+    failed = SupabaseClient(client=db)._upsert_chunked('laptop_pros_cons', rows, 'product_name', chunk_size=500)
+
+    assert failed == []
+    assert len(db.written) == 1000
+    assert db.calls == 3
+    assert sleeps == [0.5]
+
+
+def test_an_outage_stops_after_consecutive_failed_chunks(sleeps):
+    rows = make_rows(2000)
+    db = FlakyTables(lambda chunk, _: APIError("Connection refused"))
+
+    failed = SupabaseClient(client=db)._upsert_chunked('laptop_pros_cons', rows, 'product_name', chunk_size=200)
+
+    assert failed == rows
+    # Three chunks of three attempts each, no sleep after a chunk's last attempt
+    assert db.calls == 9
+    assert sleeps == [0.5, 1.0] * 3
@@ -0,0 +1,30 @@
+from utils.normalize import normalize_product_name
+
+
+def test_spellings_of_one_product_share_a_key():
+    assert normalize_product_name("맥북프로 M3") == "맥북프로m3"
+    assert normalize_product_name("맥북 프로 M3") == "맥북프로m3"
+    assert normalize_product_name("Apple MacBook Pro M3") == "맥북프로m3"
+    assert normalize_product_name("애플 맥북 에어") == normalize_product_name("맥북 에어")
+    assert normalize_product_name("삼성 갤럭시북4 프로") == normalize_product_name("Galaxy Book4 Pro")
+    assert normalize_product_name("LG전자 그램 16 2024년형") == normalize_product_name("lg 그램 16 '24")
+
+
+def test_different_makers_do_not_collide():
+    pairs = [
+        ("삼성 노트북 15", "LG 노트북 15"),
+        ("lg 울트라PC", "삼성 울트라PC"),
+        ("Apple Pro", "Samsung Pro"),
+    ]
+    for first, second in pairs:
+        assert normalize_product_name(first) != normalize_product_name(second)
+
+
+def test_maker_spellings_are_canonical():
+    assert normalize_product_name("Samsung 노트북 15") == normalize_product_name("삼성전자 노트북 15")
+    assert normalize_product_name("엘지 울트라PC") == normalize_product_name("LG 울트라PC")
+
+
+def test_hangul_compounds_keep_the_maker_prefix():
+    assert normalize_product_name("애플워치") == "애플워치"
+    assert normalize_product_name("애플워치") != normalize_product_name("워치")
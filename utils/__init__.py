@@ -1 +1,4 @@
 from .styles import CSS_STYLES, HEADER_HTML, PROS_SECTION_HTML, CONS_SECTION_HTML
+from .singleflight import SingleFlight
+from .normalize import normalize_product_name
+from .result_cache import ResultCache
@@ -0,0 +1,49 @@
+"""
+Lazily created service clients shared by the whole process
+"""
+import threading
+from config import settings
+from utils.tracing import tracer
+
+# Reentrant: a factory may itself ask for another shared client
+_lock = threading.RLock()
+_clients = {}
+
+
+def shared(name, factory):
+    """The process-wide object registered as `name`, created by `factory()` on first use"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def _create_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def _record_response_bytes(response):
+    """httpx response hook: add the body size to the active supabase.* span"""
+    response.read()
+    tracer.add('bytes', len(response.content))
+
+
+def _create_supabase_client():
+    from supabase import create_client
+    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    client.postgrest.session.event_hooks['response'].append(_record_response_bytes)
+    return client
+
+
+def get_openai_client():
+    """One OpenAI client (and connection pool) for embeddings and chat, created on first use"""
+    return shared('openai', _create_openai_client)
+
+
+def get_supabase_client():
+    """The Supabase client, created on first use"""
+    return shared('supabase', _create_supabase_client)
@@ -0,0 +1,96 @@
+"""
+Product name normalization for cache and alias lookups
+"""
+import re
+import unicodedata
+
+# Latin spellings mapped to the Hangul names used in stored products.
+# A Latin word is rewritten only if it splits entirely into these parts ("macbookpro").
+BRAND_ALIASES = {
+    "macbook": "맥북",
+    "galaxy": "갤럭시",
+    "book": "북",
+    "gram": "그램",
+    "thinkpad": "씽크패드",
+    "ideapad": "아이디어패드",
+    "zenbook": "젠북",
+    "vivobook": "비보북",
+    "surface": "서피스",
+    "pro": "프로",
+    "air": "에어",
+    "ultra": "울트라",
+    "plus": "플러스",
+    "asus": "에이수스",
+    "dell": "델",
+}
+
+# Maker names and their canonical spelling
+MAKER_TOKENS = {
+    "apple": "애플", "애플": "애플",
+    "samsung": "삼성", "삼성전자": "삼성", "삼성": "삼성",
+    "lg전자": "lg", "엘지": "lg", "lg": "lg",
+    "lenovo": "레노버", "레노버": "레노버",
+}
+# Product lines that identify their maker; the maker is dropped only next to one of these
+# ("애플 맥북" == "맥북", but "삼성 노트북 15" != "LG 노트북 15")
+MAKER_LINES = {
+    "애플": ["맥북"],
+    "삼성": ["갤럭시북"],
+    "lg": ["그램"],
+    "레노버": ["씽크패드", "아이디어패드"],
+}
+
+_LATIN_RE = re.compile(r"[a-z]+")
+_MAKER_RE = re.compile(
+    r"(?<![a-z가-힣])(" + "|".join(re.escape(t) for t in sorted(MAKER_TOKENS, key=len, reverse=True)) + r")(?![a-z가-힣])"
+)
+# "2024년형", "2024년", "24년형", "'24" -> "2024"
+_YEAR_RE = re.compile(r"(?<!\d)(?:'(\d{2})|(20\d{2})\s*년\s*형?|(\d{2})\s*년\s*형)(?!\d)")
+_NOISE_RE = re.compile(r"[\s\-_/()\[\].,·]+")
+
+
+def _expand_year(match):
+    short, full, short_hangul = match.groups()
+    if full:
+        return full
+    return "20" + (short or short_hangul)
+
+
+def _split_aliases(word):
+    """Split a Latin word into BRAND_ALIASES keys, preferring long parts; None if impossible"""
+    if not word:
+        return []
+    for end in range(len(word), 0, -1):
+        head = word[:end]
+        if head in BRAND_ALIASES:
+            rest = _split_aliases(word[end:])
+            if rest is not None:
+                return [head] + rest
+    return None
+
+
+def _replace_aliases(match):
+    parts = _split_aliases(match.group(0))
+    if parts is None:
+        return match.group(0)
+    return "".join(BRAND_ALIASES[part] for part in parts)
+
+
+def normalize_product_name(name):
+    """
+    Canonical key for a product name.
+
+    "맥북프로 M3", "맥북 프로 M3" and "Apple MacBook Pro M3" all map to "맥북프로m3";
+    a maker name is kept (in front, canonically spelled) unless the product line implies it.
+    """
+    text = unicodedata.normalize("NFKC", name or "").lower()
+    text = _YEAR_RE.sub(_expand_year, text)
+    makers = []
+    for match in _MAKER_RE.finditer(text):
+        maker = MAKER_TOKENS[match.group(1)]
+        if maker not in makers:
+            makers.append(maker)
+    text = _MAKER_RE.sub(" ", text)
+    text = _NOISE_RE.sub("", _LATIN_RE.sub(_replace_aliases, text))
+    kept = [maker for maker in makers if not any(line in text for line in MAKER_LINES[maker])]
+    return "".join(kept) + text
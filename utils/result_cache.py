@@ -0,0 +1,101 @@
+"""
+Final search result cache with TTL and stale-while-revalidate
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResultCache:
+    """
+    Size-bounded LRU of final search results.
+
+    Entries younger than `ttl` are fresh. Entries older than `ttl` but younger
+    than `stale_ttl` are still served, and the caller is expected to schedule a
+    background refresh with `refresh_async`. Older entries are treated as misses.
+    """
+
+    def __init__(self, max_entries=256, ttl=600, stale_ttl=24 * 3600, refresh_workers=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, key):
+        """Return (value, status) where status is "fresh", "stale" or None for a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age >= self.stale_ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None, None
+
+            self._entries.move_to_end(key)
+            if age < self.ttl:
+                self.hits += 1
+                return value, "fresh"
+            self.stale_hits += 1
+            return value, "stale"
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def refresh_async(self, key, func, keep=None):
+        """
+        Recompute `key` with func() in the background; at most one refresh per key.
+
+        The new value replaces the cached one only if it is not None and, when
+        given, keep(value) is true; otherwise the (stale) entry stays.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+
+        def refresh():
+            try:
+                value = func()
+                if value is not None and (keep is None or keep(value)):
+                    self.put(key, value)
+            except Exception as e:
+                print(f"Background refresh error for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'entries': len(self._entries)
+            }
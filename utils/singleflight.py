@@ -0,0 +1,142 @@
+"""
+Request coalescing: one in-flight call per key, across threads and processes
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LeaseTable:
+    """SQLite-backed leases so that only one process runs the work for a key"""
+
+    def __init__(self, path, ttl=120.0):
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def acquire(self, key):
+        """Take the lease if it is free or expired; returns True on success"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ?",
+                (key, self.owner, now + self.ttl, now)
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == self.owner
+
+    def renew(self, key):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?",
+                (time.time() + self.ttl, key, self.owner)
+            )
+            self._conn.commit()
+
+    def release(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+            self._conn.commit()
+
+    def is_held(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM leases WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] >= time.time()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key.
+
+    Within a process, followers wait for the leader's result. Across processes,
+    a lease table serializes the work so a follower only runs after the leader
+    has finished (and, for searches, stored its results).
+    """
+
+    def __init__(self, lease_path=None, lease_ttl=120.0, poll_interval=0.5):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leases = LeaseTable(lease_path, lease_ttl) if lease_path else None
+        self.poll_interval = poll_interval
+
+        self.leaders = 0
+        self.followers = 0
+
+    def _run_with_lease(self, key, func):
+        while not self.leases.acquire(key):
+            # Another process is working on this key; wait for it to finish
+            while self.leases.is_held(key):
+                time.sleep(self.poll_interval)
+
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.leases.ttl / 3):
+                self.leases.renew(key)
+
+        renewer = threading.Thread(target=heartbeat, daemon=True)
+        renewer.start()
+        try:
+            return func()
+        finally:
+            stop.set()
+            self.leases.release(key)
+
+    def do(self, key, func):
+        """Run func() once per key at a time; returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            if self.leases is not None:
+                call.result = self._run_with_lease(key, func)
+            else:
+                call.result = func()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
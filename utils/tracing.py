@@ -0,0 +1,289 @@
+"""
+Local tracing: timed spans, Prometheus-style histograms and a JSONL trace file
+
+Usage:
+    python -m utils.tracing [TRACE_FILE] [--prometheus OUT]
+"""
+import argparse
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from config import settings
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Numeric span attributes that are also summed into per-span counters
+COUNTED_ATTRIBUTES = ('bytes', 'rows', 'prompt_tokens', 'completion_tokens', 'tokens', 'cache_hits', 'cache_misses')
+METRIC_PREFIX = "shopping_span"
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation; attributes hold bytes, rows, tokens, cache hits, ..."""
+
+    def __init__(self, name, kind, parent=None, **attrs):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.start,
+            'duration': self.duration,
+            'error': self.error,
+            'attrs': self.attrs
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Tracer:
+    """
+    Records spans in-process.
+
+    Each finished span updates a duration histogram and attribute counters for its
+    name and, if a path is set, is appended to a JSONL trace file. Once the file
+    reaches `max_bytes` it is moved to `<path>.1` (replacing the previous one) and a
+    new file is started. Spans opened while another is active (in the same thread or
+    a copied context) become its children.
+    """
+
+    def __init__(self, path=None, buckets=DEFAULT_BUCKETS, enabled=True, window=2048, configure=None,
+                 max_bytes=None):
+        self.path = path
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self.window = window
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._stats = {}
+        # Optional callable returning (path, enabled, max_bytes), applied before the first span
+        self._configure = configure
+
+    def span(self, name, kind='external', **attrs):
+        """Context manager timing a block: `with tracer.span("supabase.rpc") as span: ...`"""
+        if self._configure is not None:
+            with self._lock:
+                if self._configure is not None:
+                    self.path, self.enabled, self.max_bytes = self._configure()
+                    self._configure = None
+        if not self.enabled:
+            return _noop_span()
+        return self._span(name, kind, attrs)
+
+    @contextmanager
+    def _span(self, name, kind, attrs):
+        span = Span(name, kind, _current_span.get(), **attrs)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self._finish(span)
+
+    def traced(self, name, kind='external'):
+        """Decorator form of span()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, kind):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def annotate(self, **attrs):
+        """Set attributes on the innermost active span, if any"""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attrs)
+
+    def add(self, key, amount=1):
+        """Increment a numeric attribute on the innermost active span, if any"""
+        span = _current_span.get()
+        if span is not None:
+            span.add(key, amount)
+
+    def _finish(self, span):
+        with self._lock:
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = {
+                    'kind': span.kind,
+                    'buckets': [0] * len(self.buckets),
+                    'count': 0,
+                    'sum': 0.0,
+                    'errors': 0,
+                    'counters': {},
+                    'recent': deque(maxlen=self.window)
+                }
+            stats['count'] += 1
+            stats['sum'] += span.duration
+            stats['recent'].append(span.duration)
+            for i, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    stats['buckets'][i] += 1
+            if span.error:
+                stats['errors'] += 1
+            for key in COUNTED_ATTRIBUTES:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stats['counters'][key] = stats['counters'].get(key, 0) + value
+            if span.attrs.get('cache_hit') is True:
+                stats['counters']['cache_hits'] = stats['counters'].get('cache_hits', 0) + 1
+
+            if self.path:
+                try:
+                    if self._file is None:
+                        directory = os.path.dirname(self.path)
+                        if directory:
+                            os.makedirs(directory, exist_ok=True)
+                        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+                    self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n')
+                    if self.max_bytes and self._file.tell() >= self.max_bytes:
+                        self._file.close()
+                        self._file = None
+                        os.replace(self.path, self.path + '.1')
+                except OSError as e:
+                    print(f"Trace write error: {e}")
+                    self.path = None
+
+    def summary(self):
+        """Per span name: count, errors, mean/p50/p95/p99 seconds over recent spans, counters"""
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                recent = sorted(stats['recent'])
+                result[name] = {
+                    'kind': stats['kind'],
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'mean': stats['sum'] / stats['count'],
+                    'p50': percentile(recent, 50),
+                    'p95': percentile(recent, 95),
+                    'p99': percentile(recent, 99),
+                    **stats['counters']
+                }
+            return result
+
+    def prometheus_text(self):
+        """Histograms and counters in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                f"# HELP {METRIC_PREFIX}_duration_seconds Span wall time",
+                f"# TYPE {METRIC_PREFIX}_duration_seconds histogram"
+            ]
+            for name, stats in sorted(self._stats.items()):
+                labels = f'span="{name}",kind="{stats["kind"]}"'
+                for bound, count in zip(self.buckets, stats['buckets']):
+                    lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["count"]}')
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_sum{{{labels}}} {stats["sum"]:.6f}')
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_count{{{labels}}} {stats["count"]}')
+
+            counters = {'errors': {name: stats['errors'] for name, stats in self._stats.items()}}
+            for name, stats in self._stats.items():
+                for key, value in stats['counters'].items():
+                    counters.setdefault(key, {})[name] = value
+            for key, values in sorted(counters.items()):
+                lines.append(f"# TYPE {METRIC_PREFIX}_{key}_total counter")
+                for name, value in sorted(values.items()):
+                    lines.append(f'{METRIC_PREFIX}_{key}_total{{span="{name}"}} {value:g}')
+            return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+@contextmanager
+def _noop_span():
+    yield _NoopSpan()
+
+
+def load_trace(path, tracer=None):
+    """Replay a JSONL trace file into a Tracer (without writing it again)"""
+    tracer = tracer or Tracer(window=10 ** 6)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            span = Span(entry['name'], entry['kind'], **entry['attrs'])
+            span.duration = entry['duration']
+            span.error = entry['error']
+            tracer._finish(span)
+    return tracer
+
+
+# Process-wide tracer used by the nodes and clients; reads its settings on first use
+tracer = Tracer(configure=lambda: (settings.TRACE_PATH or None, settings.TRACE_ENABLED, settings.TRACE_MAX_BYTES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a JSONL trace file by span")
+    parser.add_argument('trace', nargs='?', default=settings.TRACE_PATH)
+    parser.add_argument('--prometheus', help="also write histograms in Prometheus text format to this file")
+    args = parser.parse_args()
+
+    replay = load_trace(args.trace)
+    summary = replay.summary()
+    print(f"{'span':<32}{'kind':<10}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in sorted(summary.items(), key=lambda item: item[1]['p95'], reverse=True):
+        print(
+            f"{name:<32}{stats['kind']:<10}{stats['count']:>7}{stats['p50'] * 1000:>10.1f}"
+            f"{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}{stats['errors']:>8}"
+        )
+
+    if args.prometheus:
+        with open(args.prometheus, 'w', encoding='utf-8') as f:
+            f.write(replay.prometheus_text())
+
+
+if __name__ == '__main__':
+    main()